@@ -4,10 +4,87 @@ GridFile Module
 Provides GridFile class for reading, parsing, transforming, and writing seismic grid files
 """
 
+import gzip
 import os
+import re
+import numpy as np
 import pandas as pd
+from io import BytesIO
+from itertools import islice
 from typing import Optional, Tuple
 
+from kernels import AFFINE_MIN_POINTS, fixed_decimals, format_fixed_rows, get_kernel, transform_affine_rounded
+from proj_setup import get_transformer
+
+# Leading characters that mark header and comment lines
+HEADER_MARKERS = ('!', '@')
+AT_HEADER_LINE = re.compile(rb'^[ \t]*@[^\n]*\n?', re.MULTILINE)
+
+# Candidate delimiters in tie-breaking order (non-space delimiters win ties)
+DELIMITER_PREFERENCE = ('\t', ',', ' ')
+
+# Fixed-width fault file layout: X(12), Y(12), Z(12), ID(5), ID(5)
+FAULT_FIELD_WIDTHS = (12, 12, 12, 5, 5)
+FAULT_XYZ_WIDTH = sum(FAULT_FIELD_WIDTHS[:3])
+FAULT_MIN_LINE_LENGTH = 41  # Shortest line that carries X, Y, Z and the first ID
+FAULT_NULL_VALUE = 1e30
+FAULT_LINE_FORMAT = "%12.2f%12.2f%12.6f     1    \n"
+FAULT_NULL_OUTPUT = 9999999.0  # Written in place of missing Z values
+
+# Float field format for delimited output
+DELIMITED_FLOAT_FORMAT = '%.5f'
+
+
+def _open_output(output_path: str):
+    """Open an output file for writing text, gzip-compressed when the path ends in .gz"""
+    if output_path.endswith('.gz'):
+        # Fastest zlib level: ASCII grids still shrink several-fold
+        return gzip.open(output_path, 'wt', encoding='utf-8', compresslevel=1)
+    return open(output_path, 'w', encoding='utf-8', buffering=1 << 20)
+
+
+def data_size(file_path: str) -> int:
+    """
+    Return the size of a grid file's contents in bytes, decompressed for .gz files
+
+    For .gz files this reads the size recorded in the gzip trailer, which
+    covers the last member only and wraps at 4 GiB; the larger of it and the
+    compressed size is returned so a wrapped size cannot look smaller than the file.
+    """
+    size = os.path.getsize(file_path)
+    if file_path.endswith('.gz') and size >= 4:
+        with open(file_path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            size = max(size, int.from_bytes(f.read(4), 'little'))
+    return size
+
+
+def parse_fault_xyz(lines) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse fixed-width fault data lines into X, Y, Z arrays
+
+    Args:
+        lines: Data lines with their leading whitespace intact
+
+    Returns:
+        Tuple of (x, y, z) float64 arrays for the parseable lines, with null Z
+        values as NaN, and the indices of the lines dropped as unparseable
+    """
+    try:
+        # X, Y and Z share one width, so the leading fields form a fixed-size byte array that
+        # converts to floats in one C loop (one byte per character keeps the columns aligned)
+        buffer = ''.join([line[:FAULT_XYZ_WIDTH] for line in lines]).encode('ascii', errors='replace')
+        data = np.frombuffer(buffer, dtype=f'S{FAULT_FIELD_WIDTHS[0]}').astype(np.float64).reshape(-1, 3)
+    except ValueError:
+        # Some field is blank or malformed; parse field by field so bad fields become NaN
+        data = np.genfromtxt(lines, delimiter=FAULT_FIELD_WIDTHS, usecols=(0, 1, 2), dtype=np.float64, ndmin=2)
+    valid = ~np.isnan(data).any(axis=1)
+
+    x, y, z = (np.ascontiguousarray(column) for column in data[valid].T)
+    z[z == FAULT_NULL_VALUE] = np.nan
+    return x, y, z, np.flatnonzero(~valid)
+
+
 class GridFile:
     """Represents a seismic grid file with parsing and transformation capabilities"""
 
@@ -40,6 +117,14 @@ class GridFile:
         self.depth_datum = depth_datum  # Datum for depths/Z values
         self.crs = crs  # EPSG code for x/y coordinate system
 
+        self._raw_bytes = None  # Raw file contents, set by read()
+        self._line_bounds = None  # Newline offsets into _raw_bytes, built on demand
+        self.input_df = None  # Parsed data, set by parse()
+        self.output_df = None
+        self.output_raw = None
+        self.output_path = None
+        self._fixed_width_input = False  # True when parsed as a fixed-width fault file
+
     @property
     def input_crs(self):
         """Get the input CRS"""
@@ -48,8 +133,7 @@ class GridFile:
     @input_crs.setter
     def input_crs(self, value):
         """Set the input CRS and recompute outputs if needed"""
-        self._input_crs = value
-        self._recompute_outputs()
+        self.set_crs(value, self._output_crs)
 
     @property
     def output_crs(self):
@@ -59,8 +143,83 @@ class GridFile:
     @output_crs.setter
     def output_crs(self, value):
         """Set the output CRS and recompute outputs if needed"""
-        self._output_crs = value
-        self._recompute_outputs()
+        self.set_crs(self._input_crs, value)
+
+    def set_crs(self, input_crs: Optional[str], output_crs: Optional[str], recompute: bool = True) -> None:
+        """
+        Set both CRS at once, recomputing outputs only if either one changed
+
+        Args:
+            input_crs: Input coordinate reference system (EPSG code)
+            output_crs: Output coordinate reference system (EPSG code)
+            recompute: Recompute outputs now; pass False when the caller will
+                call prepare_output itself
+        """
+        if (input_crs, output_crs) == (self._input_crs, self._output_crs):
+            return
+        self._input_crs = input_crs
+        self._output_crs = output_crs
+        if recompute:
+            self._recompute_outputs()
+
+    @property
+    def input_raw(self):
+        """Get the raw input text, decoded on demand from the stored bytes"""
+        if self._raw_bytes is None:
+            return None
+        return self._raw_bytes.decode('utf-8', errors='replace')
+
+    @input_raw.setter
+    def input_raw(self, value):
+        """Set the raw input text"""
+        self._raw_bytes = value.encode('utf-8') if value is not None else None
+        self._line_bounds = None
+
+    @property
+    def raw_size(self) -> int:
+        """Get the size of the raw input in bytes"""
+        return len(self._raw_bytes) if self._raw_bytes is not None else 0
+
+    @property
+    def line_count(self) -> int:
+        """Get the number of raw input lines (as counted by str.split('\\n'))"""
+        if self._raw_bytes is None:
+            return 0
+        if self._line_bounds is None:
+            # Counting needs no offsets, so skip building the line index
+            return self._raw_bytes.count(b'\n') + 1
+        return len(self._line_bounds) - 1
+
+    def _get_line_bounds(self) -> np.ndarray:
+        """Get the offsets bounding each line: line i is raw[bounds[i] + 1:bounds[i + 1]]"""
+        if self._line_bounds is None:
+            newlines = np.flatnonzero(np.frombuffer(self._raw_bytes, dtype=np.uint8) == ord('\n'))
+            self._line_bounds = np.concatenate(([-1], newlines, [len(self._raw_bytes)]))
+        return self._line_bounds
+
+    def get_lines(self, start: int = 0, stop: Optional[int] = None) -> list:
+        """Decode raw input lines [start, stop) without decoding the rest of the file"""
+        if self._raw_bytes is None:
+            return []
+        if start == 0 and self._line_bounds is None:
+            # Leading lines can be found without indexing every newline in the file
+            return self._get_head_lines(stop)
+        bounds = self._get_line_bounds()
+        stop = len(bounds) - 1 if stop is None else min(stop, len(bounds) - 1)
+        if start >= stop:
+            return []
+        chunk = self._raw_bytes[bounds[start] + 1:bounds[stop]]
+        return chunk.decode('utf-8', errors='replace').split('\n')
+
+    def _get_head_lines(self, count: Optional[int] = None) -> list:
+        """Decode the first count lines (all if None), scanning for newlines only as far as the last one"""
+        if count is None:
+            return self.input_raw.split('\n')
+        if count <= 0:
+            return []
+        newlines = [match.start() for match in islice(re.finditer(b'\n', self._raw_bytes), count)]
+        end = newlines[-1] if len(newlines) == count else len(self._raw_bytes)
+        return self._raw_bytes[:end].decode('utf-8', errors='replace').split('\n')
 
     @property
     def grid_type(self):
@@ -76,10 +235,20 @@ class GridFile:
         self._recompute_outputs()
 
     def read(self) -> bool:
-        """Read the raw text data from file"""
+        """Read the raw bytes of the file in a single call"""
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                self.input_raw = f.read()
+            if self.file_path.endswith('.gz'):
+                with gzip.open(self.file_path, 'rb') as f:
+                    data = f.read()
+            else:
+                with open(self.file_path, 'rb') as f:
+                    data = f.read()
+
+            # Keep the raw bytes with universal-newline endings (CRLF and lone CR become LF);
+            # text is decoded on demand. replace returns the same object when there is nothing
+            # to replace, so LF files are not copied
+            self._raw_bytes = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+            self._line_bounds = None
             return True
         except Exception as e:
             print(f"Error reading file {self.filename}: {e}")
@@ -87,7 +256,7 @@ class GridFile:
 
     def parse(self, detect_depth_domain: bool = True) -> bool:
         """Parse the raw text data into a pandas DataFrame"""
-        if self.input_raw is None:
+        if self._raw_bytes is None:
             return False
 
         try:
@@ -95,12 +264,19 @@ class GridFile:
             if self.input_delimiter is None:
                 self.input_delimiter = self._detect_delimiter()
 
-            # Try to parse as delimited file first (works for most formats)
-            self.input_df = self._parse_delimited_file()
-
-            # If that fails and it looks like a fault file, try fixed-width parsing
-            if self.input_df is None or self.input_df.empty:
+            if self._is_fault_file():
+                # Fault files are fixed-width, so skip the delimited attempts
                 self.input_df = self._parse_fault_file()
+                self._fixed_width_input = True
+            else:
+                # Try to parse as delimited file first (works for most formats)
+                self.input_df = self._parse_delimited_file()
+                self._fixed_width_input = False
+
+                # If that fails, try fixed-width parsing
+                if self.input_df is None or self.input_df.empty:
+                    self.input_df = self._parse_fault_file()
+                    self._fixed_width_input = True
 
             if self.input_df is not None and not self.input_df.empty and detect_depth_domain:
                 # Attempt depth domain detection if grid_type is None or 'depth'
@@ -116,7 +292,7 @@ class GridFile:
             print(f"Error parsing file {self.filename}: {e}")
             return False
 
-    def _recompute_outputs(self) -> None:
+    def _recompute_outputs(self, include_column_headers: bool = False, remove_input_headers: bool = True) -> None:
         """Recompute output_df and output_raw based on current settings"""
         if self.input_df is None:
             return
@@ -134,28 +310,72 @@ class GridFile:
                 self.input_crs != self.output_crs and
                 'X' in self.output_df.columns and 'Y' in self.output_df.columns):
                 try:
-                    from pyproj import Transformer
-                    transformer = Transformer.from_crs(self.input_crs, self.output_crs, always_xy=True)
+                    x_coords = self.output_df['X'].to_numpy(dtype='float64')
+                    y_coords = self.output_df['Y'].to_numpy(dtype='float64')
+                    x_new, y_new = self._transform_xy(x_coords, y_coords)
 
-                    # Transform coordinates
-                    x_coords = self.output_df['X'].values
-                    y_coords = self.output_df['Y'].values
-
-                    transformed_coords = transformer.transform(x_coords, y_coords)
-
-                    self.output_df['X'] = transformed_coords[0]
-                    self.output_df['Y'] = transformed_coords[1]
+                    self.output_df['X'] = x_new
+                    self.output_df['Y'] = y_new
 
                 except Exception as e:
                     print(f"Coordinate transformation failed for {self.filename}: {e}")
                     # Continue without transformation
 
             # Generate output raw text
-            self._generate_output_raw()
+            self._generate_output_raw(include_column_headers=include_column_headers,
+                                      remove_input_headers=remove_input_headers)
 
         except Exception as e:
             print(f"Error recomputing outputs for {self.filename}: {e}")
 
+    def _transform_xy(self, x_coords: np.ndarray, y_coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Transform coordinate arrays from input CRS to output CRS using the fastest exact path"""
+        # Use a compiled kernel for common CRS pairs
+        kernel = get_kernel(self.input_crs, self.output_crs)
+        if kernel is not None:
+            return kernel(x_coords, y_coords)
+
+        transformer = get_transformer(self.input_crs, self.output_crs)
+
+        # Unit changes and null datum shifts are affine; apply them without PROJ, checked against
+        # the decimals X and Y are written with so the saved text matches a full PROJ transform
+        if len(x_coords) >= AFFINE_MIN_POINTS:
+            row_format = FAULT_LINE_FORMAT if self._was_input_fixed_width() else DELIMITED_FLOAT_FORMAT * 2
+            transformed = transform_affine_rounded(transformer, x_coords, y_coords, fixed_decimals(row_format)[:2])
+            if transformed is not None:
+                return transformed
+
+        # Transform all coordinates in a single batched call
+        return transformer.transform(x_coords, y_coords, errcheck=False)
+
+    def prepare_output(self, include_column_headers: bool = False, remove_input_headers: bool = True) -> bool:
+        """
+        Build output_df and output_raw from the parsed data and current settings
+
+        Coordinates are transformed only when both CRS are set; otherwise the
+        parsed data is passed through in the output delimiter and header format.
+
+        Args:
+            include_column_headers: Write an X, Y, Z header row (delimited output only)
+            remove_input_headers: Drop lines starting with ! or @ from the output
+
+        Returns:
+            True if output data is available for writing
+        """
+        if self.input_df is None:
+            return False
+
+        if self.input_crs and self.output_crs:
+            self._recompute_outputs(include_column_headers=include_column_headers,
+                                    remove_input_headers=remove_input_headers)
+        else:
+            # No transformation - keep every parsed column
+            self.output_df = self.input_df.copy()
+            self._generate_output_raw(include_column_headers=include_column_headers,
+                                      remove_input_headers=remove_input_headers)
+
+        return self.output_df is not None
+
     def transform(self) -> bool:
         """Transform coordinates from input CRS to output CRS (legacy method)"""
         self._recompute_outputs()
@@ -174,7 +394,7 @@ class GridFile:
             os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
 
             # Write the file
-            with open(self.output_path, 'w', encoding='utf-8') as f:
+            with _open_output(self.output_path) as f:
                 f.write(self.output_raw)
 
             return True
@@ -185,60 +405,41 @@ class GridFile:
 
     def _detect_delimiter(self) -> str:
         """Auto-detect the delimiter used in the file"""
-        if not self.input_raw:
+        if not self.raw_size:
             return ','
 
-        # Sample first few lines
-        lines = self.input_raw.split('\n')[:10]
-        lines = [line.strip() for line in lines if line.strip() and not line.startswith('!') and not line.startswith('@')]
+        # Sample first few lines without decoding the whole file
+        lines = self.get_lines(0, 10)
+        lines = [line.strip() for line in lines if line.strip() and not line.startswith(HEADER_MARKERS)]
 
         if not lines:
             return ','
 
-        # Count delimiters
-        tab_count = sum(line.count('\t') for line in lines)
-        comma_count = sum(line.count(',') for line in lines)
-        space_count = sum(line.count(' ') for line in lines)
+        # Count all candidates over one joined buffer, ties going to the earlier preference
+        joined = '\n'.join(lines)
+        counts = {delimiter: joined.count(delimiter) for delimiter in DELIMITER_PREFERENCE}
+        best = max(DELIMITER_PREFERENCE, key=counts.get)
 
-        # Return delimiter with highest count
-        max_count = max(tab_count, comma_count, space_count)
-        if max_count == tab_count and tab_count > 0:
-            return '\t'
-        elif max_count == comma_count and comma_count > 0:
-            return ','
-        elif max_count == space_count and space_count > 0:
-            return ' '
+        return best if counts[best] > 0 else ','  # Default
 
-        return ','  # Default
+    def _is_fault_file(self) -> bool:
+        """Check if the file is a fixed-width fault file"""
+        name = self.filename[:-3] if self.filename.endswith('.gz') else self.filename
+        return name.endswith('Faults.dat')
 
     def _parse_fault_file(self) -> Optional[pd.DataFrame]:
         """Parse fixed-width fault file"""
         try:
-            lines = self.input_raw.split('\n')
-            data = []
-
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith('!') or line.startswith('@'):
-                    continue
-
-                if len(line) >= 41:
-                    try:
-                        x_str = line[0:12].strip()
-                        y_str = line[12:24].strip()
-                        z_str = line[24:36].strip()
-
-                        if x_str and y_str:
-                            x = float(x_str)
-                            y = float(y_str)
-                            z = float(z_str) if z_str != '1e+030' else None
-                            data.append([x, y, z])
-                    except ValueError:
-                        continue
-
-            if data:
-                df = pd.DataFrame(data, columns=['X', 'Y', 'Z'])
-                return df
+            # Keep leading whitespace so the fixed-width columns stay aligned
+            lines = [line for line in self.get_lines()
+                     if len(line.rstrip()) >= FAULT_MIN_LINE_LENGTH
+                     and not line.lstrip().startswith(HEADER_MARKERS)]
+            if not lines:
+                return None
+
+            x, y, z, _ = parse_fault_xyz(lines)
+            if len(x):
+                return pd.DataFrame({'X': x, 'Y': y, 'Z': z})
             return None
 
         except Exception as e:
@@ -253,12 +454,17 @@ class GridFile:
             if self.input_delimiter not in [',', '\t', ' ', ';']:
                 delimiters_to_try.extend([',', '\t', ' ', ';'])
 
+            # pandas takes a single comment character, so drop @ header lines up front
+            data = self._raw_bytes
+            if b'@' in data:
+                data = AT_HEADER_LINE.sub(b'', data)
+
             for delimiter in delimiters_to_try:
                 try:
-                    # Use pandas to read CSV with current delimiter
-                    from io import StringIO
-                    df = pd.read_csv(StringIO(self.input_raw), delimiter=delimiter,
-                                   comment='!', header=None, skip_blank_lines=True, engine='python')
+                    # Use the pandas C parser with current delimiter straight from the raw bytes
+                    df = pd.read_csv(BytesIO(data), delimiter=delimiter,
+                                   comment='!', header=None, skip_blank_lines=True, engine='c',
+                                   encoding_errors='replace')
 
                     # Clean up the DataFrame
                     df = df.dropna(how='all')  # Remove empty rows
@@ -323,29 +529,24 @@ class GridFile:
             was_fixed_width_input = self._was_input_fixed_width()
 
             if was_fixed_width_input:
-                # Fixed-width format for fault files
-                lines = []
-                for idx, row in self.output_df.iterrows():
-                    try:
-                        x = float(row['X'])
-                        y = float(row['Y'])
-                        z = float(row['Z']) if pd.notna(row['Z']) else 9999999.0
-                        line = f"{x:12.2f}{y:12.2f}{z:12.6f}     1    \n"
-                        lines.append(line)
-                    except (ValueError, TypeError):
-                        continue
-                self.output_raw = ''.join(lines)
+                # Fixed-width format for fault files, formatted for all rows in one operation
+                columns = (
+                    self.output_df['X'].to_numpy(dtype=np.float64),
+                    self.output_df['Y'].to_numpy(dtype=np.float64),
+                    self.output_df['Z'].fillna(FAULT_NULL_OUTPUT).to_numpy(dtype=np.float64),
+                )
+                self.output_raw = format_fixed_rows(columns, FAULT_LINE_FORMAT)
+                if self.output_raw is None:
+                    xyz = np.column_stack(columns)
+                    self.output_raw = (FAULT_LINE_FORMAT * len(xyz)) % tuple(xyz.ravel().tolist())
             else:
                 # Delimited format using output_delimiter
-                csv_content = self.output_df.to_csv(index=False, sep=self.output_delimiter,
-                                                  float_format='%.5f', header=include_column_headers)
+                csv_content = self._format_delimited(include_column_headers)
 
-                # Handle input headers/comments removal
+                # Handle input headers/comments removal; formatted rows never start with ! or @
+                # and contain no blank lines, so only the trailing newline is dropped
                 if remove_input_headers:
-                    lines = csv_content.split('\n')
-                    # Skip lines that start with ! or @
-                    filtered_lines = [line for line in lines if line.strip() and not (line.strip().startswith('!') or line.strip().startswith('@'))]
-                    csv_content = '\n'.join(filtered_lines)
+                    csv_content = csv_content.rstrip('\n')
 
                 self.output_raw = csv_content
 
@@ -353,18 +554,67 @@ class GridFile:
             print(f"Error generating output raw text: {e}")
             self.output_raw = ""
 
+    def _format_delimited(self, include_column_headers: bool = False) -> str:
+        """Format output_df as delimited text, matching to_csv with five-decimal floats"""
+        df = self.output_df
+        column_formats = []
+        for dtype in df.dtypes:
+            if pd.api.types.is_float_dtype(dtype):
+                column_formats.append(DELIMITED_FLOAT_FORMAT)
+            elif pd.api.types.is_integer_dtype(dtype):
+                column_formats.append('%d')
+            else:
+                column_formats = None
+                break
+
+        values = df.to_numpy(dtype=np.float64) if column_formats else None
+        if values is None or np.isnan(values).any():
+            # Empty fields for missing values and other dtypes are left to pandas
+            return df.to_csv(index=False, sep=self.output_delimiter, float_format=DELIMITED_FLOAT_FORMAT,
+                             header=include_column_headers, lineterminator='\n')
+
+        # Format every row in one operation, keeping integer columns as integers
+        row_format = self.output_delimiter.join(column_formats) + '\n'
+        header = self.output_delimiter.join(map(str, df.columns)) + '\n' if include_column_headers else ''
+        if '%d' not in column_formats:
+            # All-float rows go through the compiled fixed-point formatter when numba is available
+            body = format_fixed_rows(values.T, row_format)
+            if body is not None:
+                return header + body
+        flat = df.to_numpy(dtype=object).ravel().tolist() if '%d' in column_formats else values.ravel().tolist()
+        return header + (row_format * len(df)) % tuple(flat)
+
     def _was_input_fixed_width(self) -> bool:
         """Check if the input was parsed as fixed-width format"""
-        # If fault file parsing succeeded and delimited parsing failed, it was fixed-width
-        if self.input_df is not None and not self.input_df.empty:
-            # Try to see if it would parse as delimited - if not, it was likely fixed-width
-            try:
-                from io import StringIO
-                test_df = pd.read_csv(StringIO(self.input_raw), delimiter=self.input_delimiter or ',',
-                                    comment='!', header=None, skip_blank_lines=True, engine='python')
-                # If we can parse it as delimited, it wasn't fixed-width
-                return False
-            except:
-                # If delimited parsing fails, it was likely fixed-width
-                return True
-        return False
\ No newline at end of file
+        return self.input_df is not None and not self.input_df.empty and self._fixed_width_input
+
+def convert_grid_file(file_path: str, output_folder: str, input_crs: Optional[str] = None,
+                      output_crs: Optional[str] = None, input_delimiter: Optional[str] = None,
+                      output_delimiter: str = ',', include_column_headers: bool = False,
+                      remove_input_headers: bool = True) -> Tuple[str, Optional[str]]:
+    """
+    Read, transform and write a single grid file
+
+    Only takes picklable arguments and builds its own GridFile and Transformer,
+    so it can run in a worker process.
+
+    Returns:
+        Tuple of (filename, error message or None on success)
+    """
+    grid_file = GridFile(file_path, input_delimiter=input_delimiter, output_delimiter=output_delimiter)
+    try:
+        if not grid_file.read() or not grid_file.parse(detect_depth_domain=False):
+            return grid_file.filename, "Read failed"
+
+        # Set CRS before transforming (prepare_output does the one transform)
+        grid_file.set_crs(input_crs, output_crs, recompute=False)
+
+        if not grid_file.prepare_output(include_column_headers=include_column_headers,
+                                        remove_input_headers=remove_input_headers):
+            return grid_file.filename, "Transform failed"
+        if not grid_file.write(output_folder):
+            return grid_file.filename, "Write failed"
+        return grid_file.filename, None
+
+    except Exception as e:
+        return grid_file.filename, str(e)
@@ -6,17 +6,114 @@ PyQt6 GUI for transforming grid data from one coordinate system to another
 
 import sys
 import os
+import multiprocessing
 import pandas as pd
 import numpy as np
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QTreeWidget, QTreeWidgetItem, QTextEdit, QPushButton, QFileDialog,
                               QSplitter, QMenuBar, QMessageBox, QProgressBar, QStatusBar,
                               QLabel, QFrame, QDialog, QLineEdit, QListWidget, QListWidgetItem,
-                              QGroupBox, QCheckBox, QComboBox, QHBoxLayout, QTabWidget, QTableWidget,
-                              QTableWidgetItem, QHeaderView)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+                              QGroupBox, QCheckBox, QComboBox, QHBoxLayout, QTabWidget, QTableView,
+                              QHeaderView)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QAbstractTableModel, QModelIndex, QSignalBlocker
 from PyQt6.QtGui import QAction, QFont, QIcon
-from gridfile import GridFile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from gridfile import GridFile, convert_grid_file, data_size
+from proj_setup import HAS_PYPROJ, configure_proj, get_transformer
+
+if HAS_PYPROJ:
+    from pyproj.database import query_crs_info
+
+# EPSG codes always offered in the CRS dialog and preloaded at startup
+IMPORTANT_EPSG = [4326, 4269, 4267, 3857, 3785]
+
+# Delimiter characters and their combo box labels
+DELIM_TO_DISPLAY = {",": "Comma (,)", " ": "Space ( )", "\t": "Tab (\\t)"}
+DISPLAY_TO_DELIM = {display: delimiter for delimiter, display in DELIM_TO_DISPLAY.items()}
+
+# Output files may also use semicolons
+OUTPUT_DISPLAY_TO_DELIM = {**DISPLAY_TO_DELIM, "Semicolon (;)": ";"}
+
+# Quiet period after the last setting change before the preview is regenerated
+PREVIEW_DEBOUNCE_MS = 150
+
+
+@lru_cache(maxsize=1)
+def load_available_crs():
+    """Get list of available CRS from pyproj"""
+    try:
+        if not HAS_PYPROJ:
+            raise ImportError("pyproj is not installed")
+        crs_list = []
+
+        # Try to load a comprehensive list of EPSG codes
+        # Common ranges for projected coordinate systems
+        epsg_ranges = [
+            range(2000, 4000),  # Various projected systems
+            range(32000, 32500),  # NAD27 state plane
+            range(32100, 32600),  # NAD83 state plane
+            range(26900, 27000),  # UTM NAD83
+            range(32600, 32800),  # UTM WGS84
+            range(3850, 3860),   # Web Mercator
+        ]
+
+        all_epsg = set()
+        for r in epsg_ranges:
+            all_epsg.update(r)
+        all_epsg.update(IMPORTANT_EPSG)
+
+        # Look up all EPSG names with a single database query instead of
+        # building a CRS object per code
+        crs_names = {int(info.code): info.name
+                     for info in query_crs_info(auth_name='EPSG', allow_deprecated=True)
+                     if info.code.isdigit()}
+
+        for epsg in sorted(all_epsg):
+            if epsg in crs_names:
+                crs_list.append({
+                    'epsg': epsg,
+                    'name': crs_names[epsg],
+                    'area': 'Various'  # Simplified for performance
+                })
+
+        return crs_list
+
+    except Exception as e:
+        print(f"Failed to load CRS definitions: {e}")
+        # Fallback hardcoded list
+        crs_list = [
+            {'epsg': 4326, 'name': 'WGS84', 'area': 'World'},
+            {'epsg': 32025, 'name': 'NAD27 Oklahoma South', 'area': 'Oklahoma'},
+            {'epsg': 32104, 'name': 'NAD83 Oklahoma South', 'area': 'Oklahoma'},
+            {'epsg': 2268, 'name': 'NAD83', 'area': 'Various regions'},
+            {'epsg': 26913, 'name': 'UTM Zone 13N NAD83', 'area': 'North America'},
+            {'epsg': 26914, 'name': 'UTM Zone 14N NAD83', 'area': 'North America'},
+            {'epsg': 32613, 'name': 'UTM Zone 13N WGS84', 'area': 'World'},
+            {'epsg': 32614, 'name': 'UTM Zone 14N WGS84', 'area': 'World'},
+            {'epsg': 3857, 'name': 'Web Mercator', 'area': 'World'},
+        ]
+        return crs_list
+
+
+class LRUCache(OrderedDict):
+    """Dictionary that evicts its least recently used entry beyond maxsize"""
+
+    def __init__(self, maxsize=16):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
 
 
 class CRSSelectionDialog(QDialog):
@@ -35,58 +132,8 @@ class CRSSelectionDialog(QDialog):
         self.init_ui()
 
     def get_available_crs(self):
-        """Get list of available CRS from pyproj"""
-        try:
-            from pyproj import CRS
-            crs_list = []
-
-            # Try to load a comprehensive list of EPSG codes
-            # Common ranges for projected coordinate systems
-            epsg_ranges = [
-                range(2000, 4000),  # Various projected systems
-                range(32000, 32500),  # NAD27 state plane
-                range(32100, 32600),  # NAD83 state plane
-                range(26900, 27000),  # UTM NAD83
-                range(32600, 32800),  # UTM WGS84
-                range(3850, 3860),   # Web Mercator
-            ]
-
-            # Add specific important ones
-            important_epsg = [4326, 4269, 4267, 3857, 3785]
-
-            all_epsg = set()
-            for r in epsg_ranges:
-                all_epsg.update(r)
-            all_epsg.update(important_epsg)
-
-            for epsg in sorted(all_epsg):
-                try:
-                    crs = CRS.from_epsg(epsg)
-                    crs_list.append({
-                        'epsg': epsg,
-                        'name': crs.name,
-                        'area': 'Various'  # Simplified for performance
-                    })
-                except:
-                    continue
-
-            return crs_list
-
-        except Exception as e:
-            print(f"Failed to load CRS definitions: {e}")
-            # Fallback hardcoded list
-            crs_list = [
-                {'epsg': 4326, 'name': 'WGS84', 'area': 'World'},
-                {'epsg': 32025, 'name': 'NAD27 Oklahoma South', 'area': 'Oklahoma'},
-                {'epsg': 32104, 'name': 'NAD83 Oklahoma South', 'area': 'Oklahoma'},
-                {'epsg': 2268, 'name': 'NAD83', 'area': 'Various regions'},
-                {'epsg': 26913, 'name': 'UTM Zone 13N NAD83', 'area': 'North America'},
-                {'epsg': 26914, 'name': 'UTM Zone 14N NAD83', 'area': 'North America'},
-                {'epsg': 32613, 'name': 'UTM Zone 13N WGS84', 'area': 'World'},
-                {'epsg': 32614, 'name': 'UTM Zone 14N WGS84', 'area': 'World'},
-                {'epsg': 3857, 'name': 'Web Mercator', 'area': 'World'},
-            ]
-            return crs_list
+        """Get list of available CRS from pyproj (loaded once per session)"""
+        return load_available_crs()
 
     def init_ui(self):
         """Initialize the dialog UI"""
@@ -124,15 +171,22 @@ class CRSSelectionDialog(QDialog):
 
     def populate_crs_list(self):
         """Populate the CRS list widget"""
-        self.crs_list.clear()
-        for crs in self.available_crs:
-            item_text = f"EPSG:{crs['epsg']} - {crs['name']}"
-            if crs['area'] != 'Unknown':
-                item_text += f" ({crs['area']})"
-
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.ItemDataRole.UserRole, crs)
-            self.crs_list.addItem(item)
+        # Suspend repaints and signals while thousands of items are added
+        self.crs_list.setUpdatesEnabled(False)
+        self.crs_list.blockSignals(True)
+        try:
+            self.crs_list.clear()
+            for crs in self.available_crs:
+                item_text = f"EPSG:{crs['epsg']} - {crs['name']}"
+                if crs['area'] != 'Unknown':
+                    item_text += f" ({crs['area']})"
+
+                item = QListWidgetItem(item_text)
+                item.setData(Qt.ItemDataRole.UserRole, crs)
+                self.crs_list.addItem(item)
+        finally:
+            self.crs_list.blockSignals(False)
+            self.crs_list.setUpdatesEnabled(True)
 
     def filter_crs(self, text=None):
         """Filter CRS list based on search text"""
@@ -140,18 +194,22 @@ class CRSSelectionDialog(QDialog):
             text = self.search_input.text()
         text = text.lower().strip()
 
-        for i in range(self.crs_list.count()):
-            item = self.crs_list.item(i)
-            crs_data = item.data(Qt.ItemDataRole.UserRole)
+        self.crs_list.setUpdatesEnabled(False)
+        try:
+            for i in range(self.crs_list.count()):
+                item = self.crs_list.item(i)
+                crs_data = item.data(Qt.ItemDataRole.UserRole)
 
-            # Show all items if search is empty
-            if not text:
-                item.setHidden(False)
-            else:
-                visible = (text in str(crs_data['epsg']).lower() or
-                          text in crs_data['name'].lower() or
-                          text in crs_data['area'].lower())
-                item.setHidden(not visible)
+                # Show all items if search is empty
+                if not text:
+                    item.setHidden(False)
+                else:
+                    visible = (text in str(crs_data['epsg']).lower() or
+                              text in crs_data['name'].lower() or
+                              text in crs_data['area'].lower())
+                    item.setHidden(not visible)
+        finally:
+            self.crs_list.setUpdatesEnabled(True)
 
     def select_crs(self):
         """Handle CRS selection"""
@@ -162,30 +220,127 @@ class CRSSelectionDialog(QDialog):
             self.selected_name = crs_data['name']
             self.accept()
 
-# Remove the old TransformationWorker class as it's no longer needed
-# The GridFile class handles all transformation and writing logic now
+class ProjWarmupWorker(QThread):
+    """Background thread that preloads CRS definitions and common transformers"""
+
+    def run(self):
+        """Move the one-time proj.db lookups off the UI thread"""
+        load_available_crs()
+        for code in IMPORTANT_EPSG:
+            try:
+                get_transformer("EPSG:4326", f"EPSG:{code}")
+            except Exception:
+                continue
+
+class BatchConversionWorker(QThread):
+    """Background thread that converts and saves a batch of files on a process pool"""
+
+    progress_updated = pyqtSignal(int)
+    transformation_complete = pyqtSignal(int, list)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, tasks, parent=None):
+        """
+        Args:
+            tasks: List of keyword argument dicts for convert_grid_file
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.tasks = tasks
+
+    def run(self):
+        """Run the conversions and report progress as each file finishes"""
+        success_count = 0
+        error_files = []
+        total_files = len(self.tasks)
+        max_workers = min(total_files, os.cpu_count() or 1)
+
+        try:
+            if max_workers > 1:
+                # Spawned processes avoid forking a process that is running Qt threads
+                executor = ProcessPoolExecutor(max_workers=max_workers,
+                                               mp_context=multiprocessing.get_context('spawn'),
+                                               initializer=configure_proj)
+                with executor:
+                    futures = [executor.submit(convert_grid_file, **task) for task in self.tasks]
+                    results = (future.result() for future in as_completed(futures))
+                    success_count = self._collect(results, total_files, error_files)
+            else:
+                # A single file or core gains nothing from the pool's startup cost
+                results = (convert_grid_file(**task) for task in self.tasks)
+                success_count = self._collect(results, total_files, error_files)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+
+        self.transformation_complete.emit(success_count, error_files)
+
+    def _collect(self, results, total_files, error_files):
+        """Tally (filename, error) results, emitting progress after each one"""
+        success_count = 0
+        for i, (filename, error) in enumerate(results):
+            if error is None:
+                success_count += 1
+            else:
+                error_files.append(f"{filename}: {error}")
+            self.progress_updated.emit(int((i + 1) / total_files * 100))
+        return success_count
+
+class XYZTableModel(QAbstractTableModel):
+    """Table model that formats X, Y, Z values on demand from an (N, 3) array"""
+
+    HEADERS = ["X Coordinate", "Y Coordinate", "Z Value"]
+    FORMATS = ("{:.5f}", "{:.5f}", "{:.4f}")
 
-class DataTableViewer(QTableWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.xyz = np.empty((0, 3))
+        self.message = None  # Single-row message shown instead of data
+
+    def set_data(self, xyz, message=None):
+        """Replace the table contents with a single model reset"""
+        self.beginResetModel()
+        self.xyz = xyz
+        self.message = message
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 1 if self.message is not None else len(self.xyz)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if self.message is not None:
+            return self.message if index.column() == 0 else ""
+        return self.FORMATS[index.column()].format(self.xyz[index.row(), index.column()])
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+class DataTableViewer(QTableView):
     """Table viewer for displaying parsed data"""
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setColumnCount(3)
-        self.setHorizontalHeaderLabels(["X Coordinate", "Y Coordinate", "Z Value"])
+        self.table_model = XYZTableModel(self)
+        self.setModel(self.table_model)
         self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.setAlternatingRowColors(True)
         self.max_rows = 1000  # Limit for performance
 
     def display_dataframe(self, df, title="Data"):
         """Display pandas DataFrame in table format"""
-        self.clearContents()
-        self.setRowCount(0)
-
         if df is None or df.empty:
-            self.insertRow(0)
-            self.setItem(0, 0, QTableWidgetItem("No data available"))
-            self.setItem(0, 1, QTableWidgetItem(""))
-            self.setItem(0, 2, QTableWidgetItem(""))
+            self.table_model.set_data(np.empty((0, 3)), "No data available")
             return
 
         # Ensure we have the expected columns
@@ -193,30 +348,18 @@ class DataTableViewer(QTableWidget):
         y_col = 'Y' if 'Y' in df.columns else df.columns[1] if len(df.columns) > 1 else df.columns[0]
         z_col = 'Z' if 'Z' in df.columns else df.columns[2] if len(df.columns) > 2 else df.columns[0]
 
-        row_count = 0
-        for idx, row in df.iterrows():
-            try:
-                x = float(row[x_col])
-                y = float(row[y_col])
-                z = float(row[z_col]) if pd.notna(row[z_col]) else 0.0
-
-                self.insertRow(row_count)
-                self.setItem(row_count, 0, QTableWidgetItem(f"{x:.5f}"))
-                self.setItem(row_count, 1, QTableWidgetItem(f"{y:.5f}"))
-                self.setItem(row_count, 2, QTableWidgetItem(f"{z:.4f}"))
-                row_count += 1
+        x = pd.to_numeric(df[x_col], errors='coerce').to_numpy(dtype=np.float64)
+        y = pd.to_numeric(df[y_col], errors='coerce').to_numpy(dtype=np.float64)
+        z = pd.to_numeric(df[z_col], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
 
-                if row_count >= self.max_rows:  # Performance limit
-                    break
+        # Skip rows without numeric coordinates and apply the performance limit
+        valid = ~(np.isnan(x) | np.isnan(y))
+        xyz = np.column_stack((x, y, z))[valid][:self.max_rows]
 
-            except (ValueError, KeyError, TypeError):
-                continue
-
-        if row_count == 0:
-            self.insertRow(0)
-            self.setItem(0, 0, QTableWidgetItem("No valid data found"))
-            self.setItem(0, 1, QTableWidgetItem(""))
-            self.setItem(0, 2, QTableWidgetItem(""))
+        if len(xyz) == 0:
+            self.table_model.set_data(xyz, "No valid data found")
+        else:
+            self.table_model.set_data(xyz)
 
     def display_parsed_data(self, data_lines, delimiter=",", title="Parsed Data", columns=None):
         """Legacy method for backward compatibility"""
@@ -348,10 +491,19 @@ class GridLabApp(QMainWindow):
         self.default_delimiter = ","  # Default input delimiter
 
         # Performance optimization caches
-        self.preview_cache = {}  # Cache for preview transformations
+        self.preview_cache = LRUCache(maxsize=16)  # Cache for preview transformations
+        self.preview_versions = {}  # Bumped per file to retire its cached previews
         self.file_delimiters = {}  # Store delimiter for each file
         self.file_columns = {}  # Store column indices for each file
 
+        # Coalesce rapid setting changes into a single preview regeneration
+        self._pending_preview_filename = None
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.timeout.connect(self._run_pending_preview)
+
+        self.batch_worker = None  # Set while a batch conversion is running
+
         self.setWindowTitle("GridLab")
         self.setGeometry(100, 100, 1400, 900)
 
@@ -391,7 +543,20 @@ class GridLabApp(QMainWindow):
         # Create menu bar
         self.create_menu_bar()
 
-        # Worker thread no longer needed - GridFile handles everything
+        # Without pyproj, warn once after the window is shown
+        if not HAS_PYPROJ:
+            QTimer.singleShot(0, self.show_pyproj_warning)
+
+        # Warm up CRS and transformer lookups in the background
+        self.warmup_worker = ProjWarmupWorker(self)
+        self.warmup_worker.start()
+
+    def closeEvent(self, event):
+        """Wait for background work before closing"""
+        self.warmup_worker.wait()
+        if self.batch_worker is not None:
+            self.batch_worker.wait()
+        super().closeEvent(event)
 
     def create_sidebar(self):
         """Create the left sidebar with file tree"""
@@ -440,7 +605,7 @@ class GridLabApp(QMainWindow):
         delimiter_layout.addWidget(delimiter_label)
 
         self.default_delimiter_combo = QComboBox()
-        self.default_delimiter_combo.addItems(["Comma (,)", "Space ( )", "Tab (\\t)"])
+        self.default_delimiter_combo.addItems(list(DISPLAY_TO_DELIM))
         self.default_delimiter_combo.currentTextChanged.connect(self.on_default_delimiter_changed)
         delimiter_layout.addWidget(self.default_delimiter_combo)
 
@@ -452,8 +617,8 @@ class GridLabApp(QMainWindow):
         output_delimiter_layout.addWidget(output_delimiter_label)
 
         self.output_delimiter_combo = QComboBox()
-        self.output_delimiter_combo.addItems(["Comma (,)", "Space ( )", "Tab (\\t)", "Semicolon (;)"])
-        self.output_delimiter_combo.setCurrentText("Comma (,)")
+        self.output_delimiter_combo.addItems(list(OUTPUT_DISPLAY_TO_DELIM))
+        self.output_delimiter_combo.setCurrentText(DELIM_TO_DISPLAY[","])
         self.output_delimiter_combo.currentTextChanged.connect(self.on_output_delimiter_changed)
         output_delimiter_layout.addWidget(self.output_delimiter_combo)
 
@@ -511,7 +676,7 @@ class GridLabApp(QMainWindow):
         # Delimiter selection
         delimiter_controls_layout.addWidget(QLabel("File Delimiter:"))
         self.file_delimiter_combo = QComboBox()
-        self.file_delimiter_combo.addItems(["Auto", "Comma (,)", "Space ( )", "Tab (\\t)"])
+        self.file_delimiter_combo.addItems(["Auto"] + list(DISPLAY_TO_DELIM))
         self.file_delimiter_combo.currentTextChanged.connect(self.on_file_delimiter_changed)
         delimiter_controls_layout.addWidget(self.file_delimiter_combo)
 
@@ -519,16 +684,19 @@ class GridLabApp(QMainWindow):
         delimiter_controls_layout.addWidget(QLabel("X Col:"))
         self.x_column_combo = QComboBox()
         self.x_column_combo.setEnabled(False)
+        self.x_column_combo.currentIndexChanged.connect(self.on_x_column_changed)
         delimiter_controls_layout.addWidget(self.x_column_combo)
 
         delimiter_controls_layout.addWidget(QLabel("Y Col:"))
         self.y_column_combo = QComboBox()
         self.y_column_combo.setEnabled(False)
+        self.y_column_combo.currentIndexChanged.connect(self.on_y_column_changed)
         delimiter_controls_layout.addWidget(self.y_column_combo)
 
         delimiter_controls_layout.addWidget(QLabel("Z Col:"))
         self.z_column_combo = QComboBox()
         self.z_column_combo.setEnabled(False)
+        self.z_column_combo.currentIndexChanged.connect(self.on_z_column_changed)
         delimiter_controls_layout.addWidget(self.z_column_combo)
 
         delimiter_controls_layout.addStretch()
@@ -629,20 +797,16 @@ class GridLabApp(QMainWindow):
             self.input_crs_label.setText(f"Input CRS: {self.input_crs_name}\nEPSG: {self.input_crs.split(':')[1]}")
             self.status_bar.showMessage(f"Input CRS set to {self.input_crs_name} ({self.input_crs})")
 
-            # Update all GridFile objects with new input CRS and clear preview cache
+            # Update all GridFile objects with new input CRS; outputs are rebuilt when previewed or saved
             for grid_file in self.grid_files.values():
-                grid_file.input_crs = self.input_crs
-                grid_file._recompute_outputs()
-
-            # Clear preview cache since CRS changed
-            self.preview_cache.clear()
+                grid_file.set_crs(self.input_crs, self.output_crs, recompute=False)
 
             # Regenerate preview if a file is currently selected
             current_item = self.file_tree.currentItem()
             if current_item:
                 filename = current_item.text(0)
                 if filename in self.grid_files:
-                    QTimer.singleShot(100, lambda: self.generate_preview(filename))
+                    self.schedule_preview(filename)
 
     def select_output_crs(self):
         """Select output coordinate reference system"""
@@ -653,20 +817,16 @@ class GridLabApp(QMainWindow):
             self.output_crs_label.setText(f"Output CRS: {self.output_crs_name}\nEPSG: {self.output_crs.split(':')[1]}")
             self.status_bar.showMessage(f"Output CRS set to {self.output_crs_name} ({self.output_crs})")
 
-            # Update all GridFile objects with new output CRS and clear preview cache
+            # Update all GridFile objects with new output CRS; outputs are rebuilt when previewed or saved
             for grid_file in self.grid_files.values():
-                grid_file.output_crs = self.output_crs
-                grid_file._recompute_outputs()
-
-            # Clear preview cache since CRS changed
-            self.preview_cache.clear()
+                grid_file.set_crs(self.input_crs, self.output_crs, recompute=False)
 
             # Regenerate preview if a file is currently selected
             current_item = self.file_tree.currentItem()
             if current_item:
                 filename = current_item.text(0)
                 if filename in self.grid_files:
-                    QTimer.singleShot(100, lambda: self.generate_preview(filename))
+                    self.schedule_preview(filename)
 
     def select_input_folder(self):
         """Select input folder containing grid files"""
@@ -685,12 +845,7 @@ class GridLabApp(QMainWindow):
     def on_default_delimiter_changed(self):
         """Handle default delimiter change"""
         delimiter_text = self.default_delimiter_combo.currentText()
-        if delimiter_text == "Comma (,)":
-            self.default_delimiter = ","
-        elif delimiter_text == "Space ( )":
-            self.default_delimiter = " "
-        elif delimiter_text == "Tab (\\t)":
-            self.default_delimiter = "\t"
+        self.default_delimiter = DISPLAY_TO_DELIM.get(delimiter_text, self.default_delimiter)
 
         self.status_bar.showMessage(f"Default delimiter set to: {delimiter_text}")
 
@@ -703,31 +858,20 @@ class GridLabApp(QMainWindow):
     def on_output_delimiter_changed(self):
         """Handle output delimiter change"""
         delimiter_text = self.output_delimiter_combo.currentText()
-        if delimiter_text == "Comma (,)":
-            self.output_delimiter = ","
-        elif delimiter_text == "Space ( )":
-            self.output_delimiter = " "
-        elif delimiter_text == "Tab (\\t)":
-            self.output_delimiter = "\t"
-        elif delimiter_text == "Semicolon (;)":
-            self.output_delimiter = ";"
+        self.output_delimiter = OUTPUT_DISPLAY_TO_DELIM.get(delimiter_text, self.output_delimiter)
 
         self.status_bar.showMessage(f"Output delimiter set to: {delimiter_text}")
 
-        # Update all GridFile objects with new output delimiter
+        # Update all GridFile objects with new output delimiter; outputs are rebuilt when previewed or saved
         for grid_file in self.grid_files.values():
             grid_file.output_delimiter = self.output_delimiter
-            grid_file._recompute_outputs()
-
-        # Clear preview cache since output format changed
-        self.preview_cache.clear()
 
         # Regenerate preview if a file is currently selected
         current_item = self.file_tree.currentItem()
         if current_item:
             filename = current_item.text(0)
             if filename in self.grid_files:
-                QTimer.singleShot(100, lambda: self.generate_preview(filename))
+                self.schedule_preview(filename)
     
     def on_file_delimiter_changed(self):
         """Handle file-specific delimiter change"""
@@ -747,17 +891,8 @@ class GridLabApp(QMainWindow):
                         delimiter = grid_file.input_delimiter or self.default_delimiter
                     else:
                         delimiter = self.default_delimiter
-                elif delimiter_text == "Comma (,)":
-                    delimiter = ","
-                    grid_file.input_delimiter = delimiter
-                elif delimiter_text == "Space ( )":
-                    delimiter = " "
-                    grid_file.input_delimiter = delimiter
-                elif delimiter_text == "Tab (\\t)":
-                    delimiter = "\t"
-                    grid_file.input_delimiter = delimiter
                 else:
-                    delimiter = self.default_delimiter
+                    delimiter = DISPLAY_TO_DELIM.get(delimiter_text, self.default_delimiter)
                     grid_file.input_delimiter = delimiter
 
                 # Re-parse the file with new delimiter
@@ -769,13 +904,11 @@ class GridLabApp(QMainWindow):
                 # Update column dropdowns based on detected columns
                 self.update_column_dropdowns(filename, delimiter)
 
-                # Clear preview cache for this file
-                preview_cache_key = f"{filename}_preview"
-                if preview_cache_key in self.preview_cache:
-                    del self.preview_cache[preview_cache_key]
+                # Retire cached previews for this file
+                self.invalidate_preview(filename)
 
-                # Regenerate preview with new delimiter (use QTimer to prevent blocking)
-                QTimer.singleShot(100, lambda: self.generate_preview(filename))
+                # Regenerate preview with new delimiter (debounced to prevent blocking)
+                self.schedule_preview(filename)
 
                 # Also update the input views immediately to reflect the new delimiter
                 self.update_input_views(filename)
@@ -797,19 +930,22 @@ class GridLabApp(QMainWindow):
         if not column_options:
             column_options = ["Col 1", "Col 2", "Col 3"]
 
-        self.x_column_combo.clear()
-        self.y_column_combo.clear()
-        self.z_column_combo.clear()
+        # Repopulate without firing the change handlers
+        with QSignalBlocker(self.x_column_combo), QSignalBlocker(self.y_column_combo), \
+                QSignalBlocker(self.z_column_combo):
+            self.x_column_combo.clear()
+            self.y_column_combo.clear()
+            self.z_column_combo.clear()
 
-        self.x_column_combo.addItems(column_options)
-        self.y_column_combo.addItems(column_options)
-        self.z_column_combo.addItems(column_options)
+            self.x_column_combo.addItems(column_options)
+            self.y_column_combo.addItems(column_options)
+            self.z_column_combo.addItems(column_options)
 
-        # Set defaults (assuming X=1, Y=2, Z=3)
-        if len(column_options) >= 3:
-            self.x_column_combo.setCurrentIndex(0)  # Col 1 (X)
-            self.y_column_combo.setCurrentIndex(1)  # Col 2 (Y)
-            self.z_column_combo.setCurrentIndex(2)  # Col 3 (Z)
+            # Set defaults (assuming X=1, Y=2, Z=3)
+            if len(column_options) >= 3:
+                self.x_column_combo.setCurrentIndex(0)  # Col 1 (X)
+                self.y_column_combo.setCurrentIndex(1)  # Col 2 (Y)
+                self.z_column_combo.setCurrentIndex(2)  # Col 3 (Z)
 
         # Store column indices for this file
         self.file_columns[filename] = {
@@ -823,20 +959,25 @@ class GridLabApp(QMainWindow):
         self.y_column_combo.setEnabled(True)
         self.z_column_combo.setEnabled(True)
 
-        # Connect change handlers (only once to avoid duplicates)
-        try:
-            self.x_column_combo.currentIndexChanged.disconnect()
-            self.y_column_combo.currentIndexChanged.disconnect()
-            self.z_column_combo.currentIndexChanged.disconnect()
-        except:
-            pass  # Ignore if not connected
-
-        self.x_column_combo.currentIndexChanged.connect(lambda: self.on_column_changed(filename, 'x'))
-        self.y_column_combo.currentIndexChanged.connect(lambda: self.on_column_changed(filename, 'y'))
-        self.z_column_combo.currentIndexChanged.connect(lambda: self.on_column_changed(filename, 'z'))
-
-    def on_column_changed(self, filename, column_type):
-        """Handle column selection changes"""
+    def on_x_column_changed(self):
+        """Handle X column selection change"""
+        self.on_column_changed('x')
+
+    def on_y_column_changed(self):
+        """Handle Y column selection change"""
+        self.on_column_changed('y')
+
+    def on_z_column_changed(self):
+        """Handle Z column selection change"""
+        self.on_column_changed('z')
+
+    def on_column_changed(self, column_type):
+        """Handle column selection changes for the currently selected file"""
+        current_item = self.file_tree.currentItem()
+        if not current_item:
+            return
+        filename = current_item.text(0)
+
         if filename not in self.file_columns:
             self.file_columns[filename] = {'x_col': 0, 'y_col': 1, 'z_col': 2}
 
@@ -851,14 +992,12 @@ class GridLabApp(QMainWindow):
         # This would require extending GridFile to handle custom column indices
         # For now, we'll keep the column selection UI but it won't affect processing
 
-        # Clear preview cache and regenerate preview with new column selections
-        preview_cache_key = f"{filename}_preview"
-        if preview_cache_key in self.preview_cache:
-            del self.preview_cache[preview_cache_key]
+        # Retire cached previews and regenerate preview with new column selections
+        self.invalidate_preview(filename)
 
         if filename in self.grid_files:
-            # Use QTimer to prevent blocking UI during preview generation
-            QTimer.singleShot(200, lambda: self.generate_preview(filename))
+            # Debounce so only the last of several quick changes regenerates the preview
+            self.schedule_preview(filename)
     
     def auto_detect_delimiter(self, filename):
         """Auto-detect delimiter for a file using GridFile's method"""
@@ -876,14 +1015,13 @@ class GridLabApp(QMainWindow):
         grid_file = self.grid_files[filename]
 
         # Update text view - show raw input data
-        if grid_file.input_raw:
+        if grid_file.raw_size:
             try:
-                # Show first 100 lines of raw data
-                lines = grid_file.input_raw.split('\n')[:100]
+                # Show first 100 lines of raw data without decoding the whole file
                 text_content = f"-- Input: {filename} --\n\n"
-                text_content += '\n'.join(lines)
-                if len(grid_file.input_raw.split('\n')) > 100:
-                    text_content += f"\n\n... ({len(grid_file.input_raw.split('\n')) - 100} more lines) ..."
+                text_content += '\n'.join(grid_file.get_lines(0, 100))
+                if grid_file.line_count > 100:
+                    text_content += f"\n\n... ({grid_file.line_count - 100} more lines) ..."
                 self.input_text_viewer.setPlainText(text_content)
             except Exception as e:
                 self.input_text_viewer.setPlainText(f"Error displaying text: {str(e)}")
@@ -909,10 +1047,11 @@ class GridLabApp(QMainWindow):
         if grid_file.output_raw:
             try:
                 text_content = f"-- {title} --\n\n"
-                lines = grid_file.output_raw.split('\n')[:100]
-                text_content += '\n'.join(lines)
-                if len(grid_file.output_raw.split('\n')) > 100:
-                    text_content += f"\n\n... ({len(grid_file.output_raw.split('\n')) - 100} more lines) ..."
+                lines = grid_file.output_raw.split('\n', 100)
+                text_content += '\n'.join(lines[:100])
+                if len(lines) > 100:
+                    more_lines = grid_file.output_raw.count('\n') + 1 - 100
+                    text_content += f"\n\n... ({more_lines} more lines) ..."
                 self.output_text_viewer.setPlainText(text_content)
             except Exception as e:
                 self.output_text_viewer.setPlainText(f"Error displaying output text: {str(e)}")
@@ -937,6 +1076,7 @@ class GridLabApp(QMainWindow):
         self.file_tree.clear()
         self.grid_files.clear()
         self.preview_cache.clear()
+        self.preview_versions.clear()
         self.file_delimiters.clear()
         self.file_columns.clear()
 
@@ -954,8 +1094,8 @@ class GridLabApp(QMainWindow):
             item = QTreeWidgetItem([filename, "Loading..."])
 
             try:
-                # Check file size first (limit to 50MB for performance)
-                file_size = os.path.getsize(file_path)
+                # Check file size first (limit to 50MB for performance, measured after decompressing .gz)
+                file_size = data_size(file_path)
                 if file_size > 50 * 1024 * 1024:  # 50MB limit
                     item.setCheckState(0, Qt.CheckState.Unchecked)
                     item.setText(1, "File too large")
@@ -971,16 +1111,7 @@ class GridLabApp(QMainWindow):
 
                     # Set delimiter display text
                     delimiter = grid_file.input_delimiter or ','
-                    if delimiter == ",":
-                        delimiter_display = "Comma (,)"
-                    elif delimiter == " ":
-                        delimiter_display = "Space ( )"
-                    elif delimiter == "\t":
-                        delimiter_display = "Tab (\\t)"
-                    else:
-                        delimiter_display = "Auto"
-
-                    item.setText(1, delimiter_display)
+                    item.setText(1, DELIM_TO_DISPLAY.get(delimiter, "Auto"))
                     item.setCheckState(0, Qt.CheckState.Checked)
                     loaded_count += 1
                 else:
@@ -1006,16 +1137,10 @@ class GridLabApp(QMainWindow):
         if filename in self.grid_files:
             grid_file = self.grid_files[filename]
 
-            # Update file delimiter combo to match detected delimiter
+            # Update file delimiter combo to match detected delimiter without re-parsing the file
             delimiter = grid_file.input_delimiter or ','
-            if delimiter == ",":
-                self.file_delimiter_combo.setCurrentText("Comma (,)")
-            elif delimiter == " ":
-                self.file_delimiter_combo.setCurrentText("Space ( )")
-            elif delimiter == "\t":
-                self.file_delimiter_combo.setCurrentText("Tab (\\t)")
-            else:
-                self.file_delimiter_combo.setCurrentText("Auto")
+            with QSignalBlocker(self.file_delimiter_combo):
+                self.file_delimiter_combo.setCurrentText(DELIM_TO_DISPLAY.get(delimiter, "Auto"))
 
             # Update column dropdowns for this file
             self.update_column_dropdowns(filename, delimiter)
@@ -1042,45 +1167,43 @@ class GridLabApp(QMainWindow):
 
         # Always show output preview, even without CRS transformation
         grid_file = self.grid_files[filename]
+        include_column_headers = self.include_column_headers_checkbox.isChecked()
+        remove_input_headers = self.remove_input_headers_checkbox.isChecked()
 
-        # Check cache first (use different cache key for non-transformed vs transformed)
         if self.input_crs and self.output_crs:
-            cache_key = f"{filename}_preview_{self.input_crs}_{self.output_crs}_transformed"
             preview_title = f"Preview: {filename} ({self.input_crs_name} → {self.output_crs_name})"
-            do_transform = True
         else:
-            cache_key = f"{filename}_preview_no_transform"
             preview_title = f"Preview: {filename} (No transformation - CRS not selected)"
-            do_transform = False
+
+        # Key on everything that shapes the output; invalidate_preview bumps the version
+        cache_key = (filename, self.preview_versions.get(filename, 0), self.input_crs, self.output_crs,
+                     self.output_delimiter, include_column_headers, remove_input_headers)
+
+        # Set CRS from GUI selection (may be empty); prepare_output does the one transform
+        grid_file.set_crs(self.input_crs, self.output_crs, recompute=False)
 
         if cache_key in self.preview_cache:
             cached_result = self.preview_cache[cache_key]
             try:
-                self.update_output_views(cached_result['grid_file'], cached_result['title'])
+                # Restore the cached output so a later save matches what is shown
+                grid_file.output_df = cached_result['output_df']
+                grid_file.output_raw = cached_result['output_raw']
+                self.update_output_views(grid_file, cached_result['title'])
                 self.save_selected_btn.setEnabled(True)
             except Exception as e:
                 QMessageBox.warning(self, "Cache Error", f"Error loading cached preview: {str(e)}")
             return
 
         try:
-            # Set CRS from GUI selection (may be empty)
-            grid_file.input_crs = self.input_crs
-            grid_file.output_crs = self.output_crs
-
             # Transform the data if CRS are selected, otherwise just prepare output format
-            if do_transform:
-                success = grid_file.transform()
-            else:
-                # No transformation - just prepare output with selected delimiter and header settings
-                success = True
-                grid_file.output_df = grid_file.input_df.copy() if grid_file.input_df is not None else None
-                grid_file._generate_output_raw(include_column_headers=self.include_column_headers_checkbox.isChecked(),
-                                             remove_input_headers=self.remove_input_headers_checkbox.isChecked())
+            success = grid_file.prepare_output(include_column_headers=include_column_headers,
+                                               remove_input_headers=remove_input_headers)
 
             if success:
-                # Cache the result
+                # Cache a snapshot of the result; the GridFile itself is rebuilt in place
                 cache_result = {
-                    'grid_file': grid_file,
+                    'output_df': grid_file.output_df,
+                    'output_raw': grid_file.output_raw,
                     'title': preview_title
                 }
                 self.preview_cache[cache_key] = cache_result
@@ -1096,6 +1219,22 @@ class GridLabApp(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Preview Error", f"Error generating preview: {str(e)}")
 
+    def invalidate_preview(self, filename):
+        """Make every cached preview of a file unreachable; the LRU cache evicts them in time"""
+        self.preview_versions[filename] = self.preview_versions.get(filename, 0) + 1
+
+    def schedule_preview(self, filename):
+        """Schedule a preview regeneration, restarting the timer if one is already pending"""
+        self._pending_preview_filename = filename
+        self._preview_timer.start(PREVIEW_DEBOUNCE_MS)
+
+    def _run_pending_preview(self):
+        """Generate the preview for the most recently scheduled file"""
+        filename = self._pending_preview_filename
+        self._pending_preview_filename = None
+        if filename is not None:
+            self.generate_preview(filename)
+
     def save_selected_output(self):
         """Save the currently selected file's transformed output"""
         if not self.output_folder:
@@ -1115,15 +1254,11 @@ class GridLabApp(QMainWindow):
         try:
             grid_file = self.grid_files[filename]
 
-            # Ensure the file has output data (transformed or not)
-            if grid_file.output_df is None and grid_file.output_raw is None:
-                if not grid_file.transform():
-                    QMessageBox.warning(self, "Error", f"Failed to process {filename}")
-                    return
-
-            # Set output generation options
-            grid_file._generate_output_raw(include_column_headers=self.include_column_headers_checkbox.isChecked(),
-                                          remove_input_headers=self.remove_input_headers_checkbox.isChecked())
+            # Build the output with the current header settings (transformed or not)
+            if not grid_file.prepare_output(include_column_headers=self.include_column_headers_checkbox.isChecked(),
+                                            remove_input_headers=self.remove_input_headers_checkbox.isChecked()):
+                QMessageBox.warning(self, "Error", f"Failed to process {filename}")
+                return
 
             # Write the transformed data
             if grid_file.write(self.output_folder):
@@ -1171,46 +1306,35 @@ class GridLabApp(QMainWindow):
                 if reply == QMessageBox.StandardButton.No:
                     return
 
-        # Transform and save each file
-        success_count = 0
-        error_files = []
+        # Capture the current settings so the batch is unaffected by later UI changes
+        tasks = [
+            {
+                'file_path': grid_file.file_path,
+                'output_folder': self.output_folder,
+                'input_crs': self.input_crs,
+                'output_crs': self.output_crs,
+                'input_delimiter': grid_file.input_delimiter,
+                'output_delimiter': self.output_delimiter,
+                'include_column_headers': self.include_column_headers_checkbox.isChecked(),
+                'remove_input_headers': self.remove_input_headers_checkbox.isChecked(),
+            }
+            for grid_file in self.grid_files.values()
+        ]
 
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        total_files = len(self.grid_files)
-
-        for i, (filename, grid_file) in enumerate(self.grid_files.items()):
-            try:
-                # Set CRS from GUI selection before transforming
-                grid_file.input_crs = self.input_crs
-                grid_file.output_crs = self.output_crs
-
-                # Only transform if both CRS are selected
-                if self.input_crs and self.output_crs:
-                    transform_success = grid_file.transform()
-                else:
-                    # No transformation - just prepare output with selected delimiter and header settings
-                    transform_success = True
-                    grid_file.output_df = grid_file.input_df.copy() if grid_file.input_df is not None else None
-                    grid_file._generate_output_raw(include_column_headers=self.include_column_headers_checkbox.isChecked(),
-                                                  remove_input_headers=self.remove_input_headers_checkbox.isChecked())
-
-                if transform_success:
-                    # Write the file
-                    if grid_file.write(self.output_folder):
-                        success_count += 1
-                    else:
-                        error_files.append(f"{filename}: Write failed")
-                else:
-                    error_files.append(f"{filename}: Transform failed")
-
-            except Exception as e:
-                error_files.append(f"{filename}: {str(e)}")
+        self.convert_all_btn.setEnabled(False)
 
-            # Update progress
-            self.progress_bar.setValue(int((i + 1) / total_files * 100))
+        self.batch_worker = BatchConversionWorker(tasks, self)
+        self.batch_worker.progress_updated.connect(self.progress_bar.setValue)
+        self.batch_worker.transformation_complete.connect(self.on_batch_conversion_complete)
+        self.batch_worker.error_occurred.connect(self.on_batch_conversion_error)
+        self.batch_worker.start()
 
+    def on_batch_conversion_complete(self, success_count, error_files):
+        """Show the results of a batch conversion"""
         self.progress_bar.setVisible(False)
+        self.convert_all_btn.setEnabled(True)
 
         # Show results
         if success_count > 0:
@@ -1224,8 +1348,21 @@ class GridLabApp(QMainWindow):
             QMessageBox.critical(self, "Batch Conversion Failed",
                                 f"Failed to convert any files.\n\nErrors:\n" + "\n".join(error_files[:10]))
 
+    def on_batch_conversion_error(self, message):
+        """Report a batch conversion that could not run"""
+        self.progress_bar.setVisible(False)
+        self.convert_all_btn.setEnabled(True)
+        QMessageBox.critical(self, "Batch Conversion Failed", f"Batch conversion failed: {message}")
+
     # Remove old worker-related methods as they're no longer needed
 
+    def show_pyproj_warning(self):
+        """Tell the user that transformations are unavailable without pyproj"""
+        QMessageBox.warning(self, "pyproj Not Available",
+                            "pyproj could not be imported, so coordinate transformations are disabled.\n\n"
+                            "Files can still be converted between delimiters without changing coordinates.\n"
+                            "Install pyproj with: pip install pyproj")
+
     def show_about(self):
         """Show about dialog"""
         QMessageBox.about(self, "About",
@@ -1235,6 +1372,7 @@ class GridLabApp(QMainWindow):
 
 def main():
     """Main application entry point"""
+    configure_proj()
     app = QApplication(sys.argv)
 
     # Set application properties
@@ -1249,4 +1387,5 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for the batch worker pool in frozen builds
     main()
\ No newline at end of file
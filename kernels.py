@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Kernels Module
+Provides compiled projection kernels for common CRS pairs so they can bypass the full PROJ pipeline
+"""
+
+import cmath
+import math
+import re
+from functools import lru_cache, partial
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the kernel as plain Python"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Point count above which an affine fit is tried before calling pyproj
+AFFINE_MIN_POINTS = 10000
+
+# Spherical radius used by Web Mercator (EPSG:3857)
+WEB_MERCATOR_RADIUS = 6378137.0
+
+# Ellipsoid parameters (semi-major axis, flattening)
+WGS84_ELLIPSOID = (6378137.0, 1 / 298.257223563)
+GRS80_ELLIPSOID = (6378137.0, 1 / 298.257222101)
+
+# Largest residual (in output units) accepted for the affine fast path
+AFFINE_TOLERANCE = 1e-6
+
+# Safety factor on the validated residual when deciding which affine results sit close
+# enough to a rounding midpoint that they could be written differently from PROJ's
+AFFINE_GUARD_FACTOR = 10.0
+
+# Largest share of the last written decimal place the guard band may cover; wider bands
+# would send so many points back through PROJ that the fast path stops paying off
+AFFINE_GUARD_SHARE = 0.1
+
+UTM_SCALE_FACTOR = 0.9996
+UTM_FALSE_EASTING = 500000.0
+UTM_FALSE_NORTHING_SOUTH = 10000000.0
+
+# Fixed-point output fields ("%.5f", "%12.2f") and the largest precision the formatter handles;
+# fields with flags ("%012.2f", "%-12.2f", "%+.2f") do not match, so their rows go through the % operator
+FIXED_FIELD = re.compile(r'%([1-9]\d*)?\.(\d+)f')
+MAX_FIXED_DECIMALS = 9
+
+# Dekker splitter (2**27 + 1) for exact double products
+DEKKER_SPLIT = 134217729.0
+
+
+@njit(parallel=True, cache=True)
+def web_mercator_fwd(lon, lat):
+    """Project WGS84 longitude/latitude in degrees to Web Mercator x/y in meters"""
+    n = lon.shape[0]
+    x = np.empty(n)
+    y = np.empty(n)
+    for i in prange(n):
+        x[i] = WEB_MERCATOR_RADIUS * np.radians(lon[i])
+        y[i] = WEB_MERCATOR_RADIUS * np.log(np.tan(np.pi / 4 + np.radians(lat[i]) / 2))
+    return x, y
+
+
+@njit(parallel=True, cache=True)
+def web_mercator_inv(x, y):
+    """Unproject Web Mercator x/y in meters to WGS84 longitude/latitude in degrees"""
+    n = x.shape[0]
+    lon = np.empty(n)
+    lat = np.empty(n)
+    for i in prange(n):
+        lon[i] = (np.degrees(x[i] / WEB_MERCATOR_RADIUS) + 180.0) % 360.0 - 180.0
+        lat[i] = np.degrees(2 * np.arctan(np.exp(y[i] / WEB_MERCATOR_RADIUS)) - np.pi / 2)
+    return lon, lat
+
+
+@njit(parallel=True, cache=True)
+def _krueger_fwd(lon, lat, lon0, k0, false_easting, false_northing, rectifying_radius, e, alpha):
+    """Transverse Mercator forward projection using the 6th order Krueger series"""
+    n = lon.shape[0]
+    x = np.empty(n)
+    y = np.empty(n)
+    for i in prange(n):
+        lam = np.radians((lon[i] - lon0 + 180.0) % 360.0 - 180.0)
+        sin_phi = np.sin(np.radians(lat[i]))
+
+        # Conformal latitude and Gauss-Schreiber coordinates
+        t = np.sinh(np.arctanh(sin_phi) - e * np.arctanh(e * sin_phi))
+        xi_prime = np.arctan2(t, np.cos(lam))
+        eta_prime = np.arctanh(np.sin(lam) / np.sqrt(1.0 + t * t))
+
+        # Clenshaw summation of sum(alpha_j * sin(2j * zeta')) over complex zeta'
+        zeta_prime = complex(xi_prime, eta_prime)
+        two_cos = 2.0 * cmath.cos(2.0 * zeta_prime)
+        b1 = 0j
+        b2 = 0j
+        for j in range(alpha.shape[0] - 1, -1, -1):
+            b1, b2 = alpha[j] + two_cos * b1 - b2, b1
+        zeta = zeta_prime + b1 * cmath.sin(2.0 * zeta_prime)
+
+        x[i] = false_easting + k0 * rectifying_radius * zeta.imag
+        y[i] = false_northing + k0 * rectifying_radius * zeta.real
+    return x, y
+
+
+@njit(parallel=True, cache=True)
+def affine_transform(x, y, coeffs):
+    """Apply x' = a*x + b*y + c, y' = d*x + e*y + f to coordinate arrays"""
+    x_new = coeffs[0] * x + coeffs[1] * y + coeffs[2]
+    y_new = coeffs[3] * x + coeffs[4] * y + coeffs[5]
+    return x_new, y_new
+
+
+@njit(parallel=True, cache=True)
+def shift_xy(x, y, x_shift, y_shift):
+    """Offset x/y coordinate arrays in place by constant shifts"""
+    for i in prange(x.shape[0]):
+        x[i] += x_shift
+        y[i] += y_shift
+
+
+@njit(cache=True)
+def _product_error(a, b, p):
+    """Return the rounding error of p = a * b, so that a * b == p + error exactly (Dekker)"""
+    c = DEKKER_SPLIT * a
+    a_hi = c - (c - a)
+    a_lo = a - a_hi
+    c = DEKKER_SPLIT * b
+    b_hi = c - (c - b)
+    b_lo = b - b_hi
+    return ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+
+
+@njit(cache=True)
+def _format_fixed(values, decimals, widths, literals, literal_offsets):
+    """
+    Format rows of values as fixed-point text, matching printf "%<width>.<decimals>f"
+
+    Each value is scaled to an integer count of its last decimal place and
+    rounded half-to-even on its exact binary value, as printf does. Returns
+    the ASCII bytes and False if any value is non-finite or too large to
+    scale exactly, leaving those rows to the caller.
+    """
+    n, k = values.shape
+    row_capacity = literal_offsets[k + 1]
+    for j in range(k):
+        row_capacity += max(widths[j], 24)
+    out = np.empty(n * row_capacity, dtype=np.uint8)
+    digits = np.empty(24, dtype=np.uint8)
+
+    pos = 0
+    for i in range(n):
+        for j in range(k + 1):
+            for b in range(literal_offsets[j], literal_offsets[j + 1]):
+                out[pos] = literals[b]
+                pos += 1
+            if j == k:
+                break
+
+            value = values[i, j]
+            scale_int = 10 ** decimals[j]
+            scale = float(scale_int)
+            magnitude = abs(value)
+            scaled = magnitude * scale
+            if not scaled < 9007199254740992.0:  # 2**53; also rejects NaN and inf
+                return out[:0], False
+
+            # Compare the exact fractional part against one half
+            whole = math.floor(scaled)
+            half_diff = (scaled - whole) - 0.5
+            neg_error = -_product_error(magnitude, scale, scaled)
+            count = np.int64(whole)
+            if half_diff > neg_error or (half_diff == neg_error and count % 2 == 1):
+                count += 1
+
+            # Write the digits in reverse: decimals, point, integer part, sign
+            length = 0
+            int_part = count // scale_int
+            frac_part = count % scale_int
+            for _ in range(decimals[j]):
+                digits[length] = 48 + frac_part % 10
+                frac_part //= 10
+                length += 1
+            if decimals[j] > 0:
+                digits[length] = 46
+                length += 1
+            while True:
+                digits[length] = 48 + int_part % 10
+                int_part //= 10
+                length += 1
+                if int_part == 0:
+                    break
+            if math.copysign(1.0, value) < 0:
+                digits[length] = 45
+                length += 1
+
+            for _ in range(widths[j] - length):
+                out[pos] = 32
+                pos += 1
+            for d in range(length - 1, -1, -1):
+                out[pos] = digits[d]
+                pos += 1
+
+    return out[:pos], True
+
+
+def fixed_decimals(row_format: str) -> Optional[Tuple[int, ...]]:
+    """Return the decimal places of each field in a row format of %W.Df fields, or None for other formats"""
+    layout = _fixed_row_layout(row_format)
+    if layout is None:
+        return None
+    return tuple(int(d) for d in layout[0])
+
+
+@lru_cache(maxsize=16)
+def _fixed_row_layout(row_format: str):
+    """Split a printf row format made only of flagless %W.Df fields into arrays for _format_fixed"""
+    fields = list(FIXED_FIELD.finditer(row_format))
+    if not fields:
+        return None
+
+    literal_parts = []
+    start = 0
+    for field in fields:
+        literal_parts.append(row_format[start:field.start()])
+        start = field.end()
+    literal_parts.append(row_format[start:])
+    if any('%' in part for part in literal_parts) or not row_format.isascii():
+        return None
+
+    decimals = np.array([int(field.group(2)) for field in fields], dtype=np.int64)
+    if decimals.max() > MAX_FIXED_DECIMALS:
+        return None
+    widths = np.array([int(field.group(1) or 0) for field in fields], dtype=np.int64)
+    literals = np.frombuffer(''.join(literal_parts).encode('ascii'), dtype=np.uint8)
+    literal_offsets = np.cumsum([0] + [len(part) for part in literal_parts]).astype(np.int64)
+    return decimals, widths, literals, literal_offsets
+
+
+def format_fixed_rows(columns, row_format: str) -> Optional[str]:
+    """
+    Format parallel column arrays with a printf row format in compiled code
+
+    Args:
+        columns: Sequence of equal-length numeric arrays, one per field
+        row_format: Row format made of "%.Nf" / "%W.Nf" fields and literal text
+
+    Returns:
+        The formatted text, identical to (row_format * n) % values, or None if
+        numba is unavailable, the format has other conversions, or a value
+        cannot be formatted exactly
+    """
+    if not HAS_NUMBA:
+        return None
+
+    layout = _fixed_row_layout(row_format)
+    if layout is None or len(columns) != len(layout[0]):
+        return None
+
+    values = np.ascontiguousarray(np.column_stack(columns), dtype=np.float64)
+    buffer, ok = _format_fixed(values, *layout)
+    if not ok:
+        return None
+    return buffer.tobytes().decode('ascii')
+
+
+def _extent_grid(x_min: float, x_max: float, y_min: float, y_max: float, size: int):
+    """Return flattened x/y coordinates of a size x size grid spanning an extent"""
+    grid_x, grid_y = np.meshgrid(np.linspace(x_min, x_max, size), np.linspace(y_min, y_max, size))
+    return grid_x.ravel(), grid_y.ravel()
+
+
+def fit_affine(transformer, x: np.ndarray, y: np.ndarray,
+               tolerance: float = AFFINE_TOLERANCE) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    Fit an affine approximation of a transformer over the extent of the data
+
+    Args:
+        transformer: pyproj Transformer to approximate
+        x: Input x coordinates
+        y: Input y coordinates
+        tolerance: Largest residual accepted on the validation grid
+
+    Returns:
+        Tuple of (six affine coefficients for affine_transform, largest residual
+        on the validation grid), or None if the transformation is not affine
+        within tolerance (e.g. a real reprojection or a grid-based datum shift)
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.any():
+        return None
+    x_min, x_max = x[finite].min(), x[finite].max()
+    y_min, y_max = y[finite].min(), y[finite].max()
+
+    # Calibrate on a coarse grid over the data extent
+    cal_x, cal_y = _extent_grid(x_min, x_max, y_min, y_max, 5)
+    cal_tx, cal_ty = transformer.transform(cal_x, cal_y)
+    design = np.column_stack((cal_x, cal_y, np.ones_like(cal_x)))
+    coeffs_x = np.linalg.lstsq(design, cal_tx, rcond=None)[0]
+    coeffs_y = np.linalg.lstsq(design, cal_ty, rcond=None)[0]
+    coeffs = np.concatenate((coeffs_x, coeffs_y))
+
+    # Validate against the transformer on a denser grid over the same extent
+    val_x, val_y = _extent_grid(x_min, x_max, y_min, y_max, 9)
+    ref_x, ref_y = transformer.transform(val_x, val_y)
+    approx_x, approx_y = affine_transform(val_x, val_y, coeffs)
+    residual = max(np.max(np.abs(approx_x - ref_x)), np.max(np.abs(approx_y - ref_y)))
+    if not np.isfinite(residual) or residual > tolerance:
+        return None
+    return coeffs, residual
+
+
+def _near_rounding_midpoint(values: np.ndarray, decimals: int, guard: float) -> np.ndarray:
+    """Mask values within guard (plus float error) of a midpoint between two decimals-place outputs"""
+    scale = 10.0 ** decimals
+    scaled = values * scale
+    distance = np.abs(scaled - np.floor(scaled) - 0.5) / scale
+    # NaN and inf compare False, so they are masked too
+    return ~(distance > guard + 4 * np.spacing(np.abs(values)))
+
+
+def transform_affine_rounded(transformer, x: np.ndarray, y: np.ndarray,
+                             decimals: Sequence[int]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Transform coordinates through an affine fit without changing their written values
+
+    The fit is accepted only when its residual is a small share of the last
+    decimal place written. Points whose affine result lies within the guard
+    band around a rounding midpoint could still round differently from PROJ's
+    result, so those points are transformed by the transformer itself.
+
+    Args:
+        transformer: pyproj Transformer to approximate
+        x: Input x coordinates
+        y: Input y coordinates
+        decimals: Decimal places written for the output x and y
+
+    Returns:
+        The transformed (x, y) arrays, or None if the transformation is not
+        affine closely enough for the output precision
+    """
+    tolerance = min(AFFINE_TOLERANCE, AFFINE_GUARD_SHARE * 10.0 ** -max(decimals) / AFFINE_GUARD_FACTOR)
+    fit = fit_affine(transformer, x, y, tolerance)
+    if fit is None:
+        return None
+    coeffs, residual = fit
+
+    x_new, y_new = affine_transform(x, y, coeffs)
+    guard = AFFINE_GUARD_FACTOR * residual
+    redo = _near_rounding_midpoint(x_new, decimals[0], guard) | _near_rounding_midpoint(y_new, decimals[1], guard)
+    if redo.any():
+        x_new[redo], y_new[redo] = transformer.transform(x[redo], y[redo])
+    return x_new, y_new
+
+
+def _krueger_coefficients(a: float, f: float):
+    """Return (rectifying radius, eccentricity, alpha coefficients) for an ellipsoid"""
+    n = f / (2 - f)
+    rectifying_radius = a / (1 + n) * (1 + n**2 / 4 + n**4 / 64 + n**6 / 256)
+    alpha = np.array([
+        n / 2 - 2 * n**2 / 3 + 5 * n**3 / 16 + 41 * n**4 / 180 - 127 * n**5 / 288 + 7891 * n**6 / 37800,
+        13 * n**2 / 48 - 3 * n**3 / 5 + 557 * n**4 / 1440 + 281 * n**5 / 630 - 1983433 * n**6 / 1935360,
+        61 * n**3 / 240 - 103 * n**4 / 140 + 15061 * n**5 / 26880 + 167603 * n**6 / 181440,
+        49561 * n**4 / 161280 - 179 * n**5 / 168 + 6601661 * n**6 / 7257600,
+        34729 * n**5 / 80640 - 3418889 * n**6 / 1995840,
+        212378941 * n**6 / 319334400,
+    ])
+    return rectifying_radius, np.sqrt(f * (2 - f)), alpha
+
+
+def utm_fwd(lon: np.ndarray, lat: np.ndarray, zone: int, south: bool = False,
+            ellipsoid=WGS84_ELLIPSOID):
+    """Project longitude/latitude in degrees to UTM easting/northing in meters"""
+    rectifying_radius, e, alpha = _krueger_coefficients(*ellipsoid)
+    lon0 = -183.0 + 6.0 * zone
+    false_northing = UTM_FALSE_NORTHING_SOUTH if south else 0.0
+    return _krueger_fwd(np.ascontiguousarray(lon, dtype=np.float64), np.ascontiguousarray(lat, dtype=np.float64),
+                        lon0, UTM_SCALE_FACTOR, UTM_FALSE_EASTING, false_northing,
+                        rectifying_radius, e, alpha)
+
+
+def _as_float_arrays(kernel: Callable) -> Callable:
+    """Wrap a kernel so it accepts any array-like input"""
+    def wrapper(x, y):
+        return kernel(np.ascontiguousarray(x, dtype=np.float64), np.ascontiguousarray(y, dtype=np.float64))
+    return wrapper
+
+
+def _epsg_code(crs: Optional[str]) -> Optional[int]:
+    """Extract the integer code from an 'EPSG:<code>' string"""
+    if not crs:
+        return None
+    authority, _, code = crs.partition(':')
+    if authority.upper() != 'EPSG' or not code.isdigit():
+        return None
+    return int(code)
+
+
+def get_kernel(input_crs: Optional[str], output_crs: Optional[str]) -> Optional[Callable]:
+    """
+    Look up a projection kernel for a CRS pair
+
+    Args:
+        input_crs: Input coordinate reference system (EPSG code)
+        output_crs: Output coordinate reference system (EPSG code)
+
+    Returns:
+        Callable taking (x, y) arrays in always_xy order and returning the
+        transformed (x, y) arrays, or None if the pair needs pyproj
+    """
+    # Without numba the kernels run as Python loops, so leave everything to pyproj
+    if not HAS_NUMBA:
+        return None
+
+    source = _epsg_code(input_crs)
+    target = _epsg_code(output_crs)
+    if source is None or target is None:
+        return None
+
+    if (source, target) == (4326, 3857):
+        return _as_float_arrays(web_mercator_fwd)
+    if (source, target) == (3857, 4326):
+        return _as_float_arrays(web_mercator_inv)
+
+    # WGS 84 / UTM zones north (326xx) and south (327xx)
+    if source == 4326 and (32601 <= target <= 32660 or 32701 <= target <= 32760):
+        return partial(utm_fwd, zone=target % 100, south=target > 32700)
+
+    # NAD83 / UTM zones 1N-23N
+    if source == 4269 and 26901 <= target <= 26923:
+        return partial(utm_fwd, zone=target % 100, ellipsoid=GRS80_ELLIPSOID)
+
+    return None
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+PROJ Setup Module
+Provides the shared pyproj import, offline PROJ configuration and Transformer cache
+"""
+
+import os
+from functools import lru_cache
+
+try:
+    import pyproj.datadir
+    import pyproj.network
+    from pyproj import Transformer
+    HAS_PYPROJ = True
+    PYPROJ_IMPORT_ERROR = None
+except ImportError as e:
+    Transformer = None
+    HAS_PYPROJ = False
+    PYPROJ_IMPORT_ERROR = e
+
+# Datum-shift grids (.tif/.gsb) placed here are used without going through PROJ's network CDN
+PROJ_GRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'proj_grids')
+
+_proj_configured = False
+
+
+def configure_proj() -> None:
+    """
+    Keep PROJ offline and add the local grid directory to its search path
+
+    Called once by each entry point and pool worker initializer, since spawned
+    processes start with pyproj's defaults. Does nothing without pyproj or
+    when the process is already configured.
+    """
+    global _proj_configured
+    if not HAS_PYPROJ or _proj_configured:
+        return
+    pyproj.network.set_network_enabled(False)
+    if os.path.isdir(PROJ_GRID_DIR):
+        pyproj.datadir.append_data_dir(PROJ_GRID_DIR)
+    _proj_configured = True
+
+
+@lru_cache(maxsize=32)
+def get_transformer(input_crs: str, output_crs: str):
+    """Return a cached always_xy Transformer for the given CRS pair"""
+    if not HAS_PYPROJ:
+        raise ImportError("pyproj is required for coordinate transformations")
+    return Transformer.from_crs(input_crs, output_crs, always_xy=True)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Kernels Tests
+Checks the compiled fixed-point formatter against Python's % operator
+
+Run with: python -m pytest test_kernels.py
+"""
+
+import numpy as np
+import pytest
+
+from kernels import HAS_NUMBA, format_fixed_rows
+
+pytestmark = pytest.mark.skipif(not HAS_NUMBA, reason="format_fixed_rows needs numba")
+
+ROW_FORMATS = (
+    "%.5f,%.5f,%.4f\n",
+    "%12.2f%12.2f%12.6f     1    \n",
+    "%.0f\t%3.1f\t%.9f\n",
+)
+
+
+def printf_rows(columns, row_format):
+    """Format rows one at a time with the % operator"""
+    return ''.join(row_format % row for row in zip(*(np.asarray(column).tolist() for column in columns)))
+
+
+def assert_matches_printf(columns, row_format):
+    assert format_fixed_rows(columns, row_format) == printf_rows(columns, row_format)
+
+
+@pytest.mark.parametrize("row_format", ROW_FORMATS)
+def test_random_values(row_format):
+    rng = np.random.default_rng(20251016)
+    n = 50_000
+    columns = [rng.uniform(-1, 1, n) * 10.0 ** rng.integers(-10, 7, n) for _ in range(3)]
+    assert_matches_printf(columns, row_format)
+
+
+@pytest.mark.parametrize("row_format", ROW_FORMATS)
+def test_random_grid_coordinates(row_format):
+    rng = np.random.default_rng(7)
+    n = 50_000
+    columns = [rng.uniform(-3e6, 3e6, n), rng.uniform(-1e6, 1e6, n), rng.uniform(-9000, 0, n)]
+    assert_matches_printf(columns, row_format)
+
+
+def test_exact_binary_ties_round_half_even():
+    rng = np.random.default_rng(3)
+    halves = rng.integers(-10**9, 10**9, 20_000) + 0.5
+    eighths = rng.integers(-10**9, 10**9, 20_000) * 0.125
+    assert_matches_printf([halves], "%.0f\n")
+    assert_matches_printf([eighths], "%.2f\n")
+    assert_matches_printf([np.array([0.5, 1.5, 2.5, -0.5, -2.5])], "%.0f\n")
+    assert_matches_printf([np.array([0.125, 0.375, -0.625, -0.875])], "%.2f\n")
+
+
+def test_decimal_ties_round_on_binary_value():
+    # Decimal midpoints like 2.675 are stored slightly above or below the tie
+    rng = np.random.default_rng(5)
+    values = (rng.integers(-10**7, 10**7, 20_000) * 10 + 5) / 1000.0
+    assert_matches_printf([values], "%.2f\n")
+    assert_matches_printf([np.array([2.675, 1.005, 0.045, 1.115, 12345.675, 5e-6, 1.5e-5])], "%.2f\n")
+    assert_matches_printf([values], "%10.5f\n")
+
+
+def test_negative_zero():
+    values = np.array([-0.0, 0.0, -0.001, -0.004999, -1e-12, -0.4, -0.5, 0.4])
+    for row_format in ("%.0f\n", "%.2f\n", "%8.3f\n"):
+        assert_matches_printf([values], row_format)
+
+
+def test_large_magnitudes():
+    # Values whose scaled magnitude reaches 2**53 are handed back to the caller
+    fits = np.array([9.0e13, -9.0e13, 123456789012.345, 2.0**53 / 100 - 1])
+    assert_matches_printf([fits], "%.2f\n")
+    for value in (1e15, -9.1e15, 1e22, 1.7976931348623157e308):
+        result = format_fixed_rows([np.array([1.0, value])], "%.2f\n")
+        assert result is None or result == printf_rows([[1.0, value]], "%.2f\n")
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+def test_non_finite_values_fall_back(value):
+    assert format_fixed_rows([np.array([1.0, value, 2.0])], "%.5f\n") is None
+
+
+@pytest.mark.parametrize("row_format", ["%012.2f\n", "%-12.2f\n", "%+.2f\n", "% .2f\n", "%#.2f\n", "%0.2f\n"])
+def test_flagged_fields_fall_back(row_format):
+    assert format_fixed_rows([np.array([-1.25, 3.5])], row_format) is None
@@ -4,62 +4,231 @@ Coordinate Transformation Script
 Transforms seismic grid data from NAD27 Oklahoma South to NAD83 Oklahoma South
 """
 
+import csv
+import mmap
+import multiprocessing
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from itertools import groupby, islice
+
+import numpy as np
+import pandas as pd
+
+from gridfile import FAULT_LINE_FORMAT, FAULT_MIN_LINE_LENGTH, FAULT_NULL_OUTPUT, HEADER_MARKERS, parse_fault_xyz
+from kernels import AFFINE_MIN_POINTS, HAS_NUMBA, fixed_decimals, format_fixed_rows, shift_xy, transform_affine_rounded
+from proj_setup import HAS_PYPROJ, PYPROJ_IMPORT_ERROR, configure_proj, get_transformer
+
+# Threads used to transform one chunk; pool workers drop this to 1 since files already run in parallel
+_transform_threads = os.cpu_count() or 1
+
+# NAD27 Oklahoma South to NAD83 Oklahoma South
+SOURCE_CRS = "EPSG:32025"
+TARGET_CRS = "EPSG:32104"
+
+# Bytes of input parsed and transformed per batched pyproj call; bounds memory on very large files
+CHUNK_BYTES = 32 << 20
+
+# Smallest slice of a chunk worth handing to its own transform thread
+THREAD_MIN_POINTS = 100_000
+
+# Comma-separated X, Y, Z output rows (fault files keep gridfile's fixed-width layout)
+CSV_ROW_FORMAT = "%.5f,%.5f,%.4f\n"
+CSV_XY_DECIMALS = fixed_decimals(CSV_ROW_FORMAT)[:2]
+
+# proj reads whitespace-separated "x y" pairs; %r keeps full float precision
+PROJ_INPUT_FORMAT = "%r %r\n"
+
+def open_output(output_file):
+    """Open an output file with a 1 MB buffer and no newline translation, so chunk writes go straight through"""
+    return open(output_file, 'w', buffering=1 << 20, newline='')
 
 def check_pyproj():
     """Check if pyproj is working properly"""
-    try:
-        from pyproj import Transformer
-        return True
-    except ImportError as e:
-        print(f"pyproj import failed: {e}")
-        return False
+    if not HAS_PYPROJ:
+        print(f"pyproj import failed: {PYPROJ_IMPORT_ERROR}")
+    return HAS_PYPROJ
+
+def transform_with_pyproj(input_file, output_file, transformer=None):
+    """Transform using pyproj library, reusing the cached transformer unless one is given"""
+    if transformer is None:
+        try:
+            # NAD27 Oklahoma South (EPSG:32025) to NAD83 Oklahoma South (EPSG:32104)
+            transformer = get_transformer(SOURCE_CRS, TARGET_CRS)
+        except ImportError:
+            print("Failed to import pyproj, trying alternative method...")
+            return transform_with_fallback(input_file, output_file)
+        except Exception as e:
+            print(f"Failed to create transformer: {e}")
+            print("Trying alternative transformation method...")
+            return transform_with_fallback(input_file, output_file)
+
+    transform_csv(input_file, output_file, transformer)
+
+def transform_csv(input_file, output_file, transformer):
+    """
+    Transform a comma-separated X, Y, Z file with the given transformer
 
-def transform_with_pyproj(input_file, output_file):
-    """Transform using pyproj library"""
-    try:
-        from pyproj import Transformer
-    except ImportError:
-        print("Failed to import pyproj, trying alternative method...")
-        return transform_with_fallback(input_file, output_file)
+    Args:
+        input_file (str): Path to input .dat file
+        output_file (str): Path to output .dat file
+        transformer: always_xy pyproj Transformer to apply
+    """
+    print(f"Transforming {input_file} to {output_file}")
 
-    try:
-        # Define coordinate transformation
-        # NAD27 Oklahoma South (EPSG:32025) to NAD83 Oklahoma South (EPSG:32104)
-        transformer = Transformer.from_crs("EPSG:32025", "EPSG:32104", always_xy=True)
-    except Exception as e:
-        print(f"Failed to create transformer: {e}")
-        print("Trying alternative transformation method...")
-        return transform_with_fallback(input_file, output_file)
+    with open_output(output_file) as outfile:
+        for x, y, z in read_xyz_chunks(input_file):
+            x_new, y_new = transform_xy(transformer, x, y, CSV_XY_DECIMALS)
 
-    print(f"Transforming {input_file} to {output_file}")
+            # Write transformed coordinates with same precision as input
+            outfile.write(format_rows(x_new, y_new, z))
 
-    with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-        for line_num, line in enumerate(infile, 1):
-            line = line.strip()
-            if not line:
-                continue
+def transform_xy(transformer, x, y, decimals=None):
+    """
+    Transform coordinate arrays, skipping PROJ where that cannot change the written output
 
-            try:
-                # Parse the comma-separated values
-                parts = line.split(',')
-                if len(parts) != 3:
-                    print(f"Warning: Skipping line {line_num} - expected 3 values, got {len(parts)}")
-                    continue
+    Args:
+        transformer: always_xy pyproj Transformer to apply
+        x, y: Input coordinate arrays
+        decimals: Decimal places the output x and y are written with; the affine
+            fast path is only tried when this is given
+    """
+    if decimals is not None and len(x) >= AFFINE_MIN_POINTS:
+        transformed = transform_affine_rounded(transformer, x, y, decimals)
+        if transformed is not None:
+            return transformed
+
+    # Large chunks are split across threads; PROJ releases the GIL while it transforms arrays
+    threads = min(_transform_threads, len(x) // THREAD_MIN_POINTS)
+    if threads > 1:
+        return _transform_threaded(transformer, x, y, threads)
+
+    # Transform the whole chunk in one call (always_xy=True means x is easting, y is northing)
+    return transformer.transform(x, y)
+
+def _transform_threaded(transformer, x, y, threads):
+    """Transform equal slices of the coordinate arrays concurrently, one thread per slice"""
+    bounds = np.linspace(0, len(x), threads + 1).astype(int)
+    x_new = np.empty_like(x)
+    y_new = np.empty_like(y)
+
+    def transform_slice(start, end):
+        x_new[start:end], y_new[start:end] = transformer.transform(x[start:end], y[start:end])
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        # Consume the results so exceptions from any slice are raised here
+        list(executor.map(transform_slice, bounds[:-1], bounds[1:]))
+    return x_new, y_new
+
+def format_rows(*columns, row_format=CSV_ROW_FORMAT):
+    """Format parallel column arrays as text rows, using the compiled fixed-point formatter when it applies"""
+    text = format_fixed_rows(columns, row_format)
+    if text is None:
+        # Otherwise format every row in a single string-formatting operation
+        flat = np.column_stack(columns).ravel().tolist()
+        text = (row_format * len(columns[0])) % tuple(flat)
+    return text
+
+def read_xyz_chunks(input_file, chunk_bytes=CHUNK_BYTES):
+    """
+    Read comma-separated X, Y, Z rows in chunks, skipping malformed lines
 
-                x, y, z = map(float, parts)
+    The file is memory-mapped and split into blocks of whole lines, so the
+    page cache feeds the parser without going through text-mode line iteration.
 
-                # Transform coordinates (always_xy=True means x is easting, y is northing)
-                x_new, y_new = transformer.transform(x, y)
+    Args:
+        input_file (str): Path to input .dat file
+        chunk_bytes (int): Approximate number of bytes per chunk
 
-                # Write transformed coordinates with same precision as input
-                outfile.write(f"{x_new:.5f},{y_new:.5f},{z:.4f}\n")
+    Yields:
+        Tuple of (x, y, z) float64 arrays for each chunk
+    """
+    with open(input_file, 'rb') as f:
+        # mmap cannot map empty files
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = 0
+            line_num = 0
+            skipped = 0
+            first_skipped = None
+            while start < size:
+                # Extend each block to the end of the line it stops in
+                end = start + chunk_bytes
+                if end < size:
+                    newline = mm.find(b'\n', end - 1)
+                    end = size if newline == -1 else newline + 1
+                else:
+                    end = size
+                block = mm[start:end]
+                start = end
+
+                # Parse clean blocks in C; malformed blocks are filtered with a vectorized mask
+                chunk = parse_xyz_block(block)
+                if chunk is None:
+                    *chunk, bad_rows = parse_malformed_xyz_block(block)
+                    if len(bad_rows):
+                        skipped += len(bad_rows)
+                        first_skipped = first_skipped or line_num + int(bad_rows[0]) + 1
+                line_num += block.count(b'\n')
+
+                if len(chunk[0]):
+                    yield chunk
+
+    report_skipped(input_file, skipped, first_skipped)
+
+def report_skipped(input_file, skipped, first_skipped):
+    """Print one summary for the malformed lines skipped in a file, instead of a warning per line"""
+    if skipped:
+        print(f"Warning: Skipped {skipped} malformed line(s) in {input_file} (first at line {first_skipped})")
+
+def parse_xyz_block(block):
+    """Parse a block of clean X, Y, Z lines with the pandas C parser, or return None if any line is malformed"""
+    try:
+        # Quotes are ordinary text, so a stray quote cannot swallow the lines after it
+        df = pd.read_csv(BytesIO(block), header=None, dtype=np.float64, engine='c', quoting=csv.QUOTE_NONE,
+                         skip_blank_lines=True, float_precision='round_trip')
+    except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        return None
+
+    # Short rows come back padded with NaN
+    data = df.to_numpy()
+    if data.shape[1] != 3 or not np.isfinite(data).all():
+        return None
+
+    # Keep x, y and z as separate contiguous, writable arrays for pyproj and the kernels
+    x, y, z = (np.ascontiguousarray(column) for column in data.T)
+    return x, y, z
+
+def parse_malformed_xyz_block(block):
+    """
+    Parse a block of X, Y, Z lines containing malformed lines, dropping them with a vectorized mask
 
-            except Exception as e:
-                print(f"Warning: Skipping line {line_num} - transformation error: {e}")
-                continue
+    Args:
+        block (bytes): Whole lines of comma-separated text
+
+    Returns:
+        Tuple of (x, y, z) float64 arrays and the zero-based line offsets of
+        the dropped lines that held more than whitespace and commas
+    """
+    # Split into lines and fields with vectorized string methods rather than the CSV tokenizer,
+    # which rejects the whole block on a long row or an unbalanced quote; row numbers stay line offsets
+    lines = pd.Series(block.decode(errors='replace').split('\n'))
+    fields = lines.str.split(',', n=2, expand=True).reindex(columns=range(3))
+    # Lines made only of whitespace and separators (",,") count as blank, not malformed
+    blank = lines.str.strip(' \t\r\f\v,').eq('').to_numpy()
+
+    # Keep rows with exactly three finite numbers
+    numeric = fields.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    mask = np.isfinite(numeric).all(axis=1) & lines.str.count(',').eq(2).to_numpy()
+
+    # Convert the surviving strings exactly as float() would
+    x, y, z = (np.ascontiguousarray(column) for column in fields[mask].to_numpy(dtype=np.float64).T)
+    return x, y, z, np.flatnonzero(~mask & ~blank)
 
 def transform_with_fallback(input_file, output_file):
     """Fallback transformation method using approximate conversion"""
@@ -70,53 +239,68 @@ def transform_with_fallback(input_file, output_file):
     x_shift = 2.5   # feet (conservative shift for Oklahoma South)
     y_shift = -2.5  # feet (conservative shift for Oklahoma South)
 
-    with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-        for line_num, line in enumerate(infile, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                # Check if this is a fault file (fixed-width format)
-                if input_file.endswith('Faults.dat'):
-                    # Parse fixed-width format: X(12), Y(12), Z(12), ID(5)
-                    if len(line) >= 41:  # Minimum length for valid data
-                        x_str = line[0:12].strip()
-                        y_str = line[12:24].strip()
-                        z_str = line[24:36].strip()
-
-                        x = float(x_str)
-                        y = float(y_str)
-                        z = float(z_str) if z_str != '1e+030' else 9999999.0  # Handle null values
-
-                        # Apply approximate shift
-                        x_new = x + x_shift
-                        y_new = y + y_shift
-
-                        # Write in fixed-width format to match input
-                        outfile.write(f"{x_new:12.2f}{y_new:12.2f}{z:12.6f}     1    \n")
-                    else:
-                        # Skip header lines
-                        outfile.write(line + '\n')
-                else:
-                    # Handle comma-separated format for other files
-                    parts = line.split(',')
-                    if len(parts) != 3:
-                        print(f"Warning: Skipping line {line_num} - expected 3 values, got {len(parts)}")
-                        continue
-
-                    x, y, z = map(float, parts)
-
-                    # Apply approximate shift
-                    x_new = x + x_shift
-                    y_new = y + y_shift
+    # The format is fixed per file, so pick the specialised reader once up front
+    transform_file = _transform_fallback_fwf if input_file.endswith('Faults.dat') else _transform_fallback_csv
+    with open_output(output_file) as outfile:
+        transform_file(input_file, outfile, x_shift, y_shift)
+
+def _transform_fallback_csv(input_file, outfile, x_shift, y_shift):
+    """Shift a comma-separated X, Y, Z file chunk by chunk with the compiled kernel"""
+    for x, y, z in read_xyz_chunks(input_file):
+        apply_shift(x, y, x_shift, y_shift)
+        outfile.write(format_rows(x, y, z))
+
+def _transform_fallback_fwf(input_file, outfile, x_shift, y_shift):
+    """Shift a fixed-width fault file, passing header lines through unchanged"""
+    with open(input_file, 'r') as infile:
+        # Keep leading whitespace so the fixed-width columns stay aligned
+        lines = [line.rstrip() for line in infile]
+
+    skipped = 0
+    first_skipped = None
+    for is_data, run in groupby(enumerate(lines, 1), key=lambda numbered: is_fault_data_line(numbered[1])):
+        line_nums, run_lines = zip(*run)
+        if not is_data:
+            # Header and comment lines are copied through without their padding
+            outfile.writelines(line.strip() + '\n' for line in run_lines if line.strip())
+            continue
+
+        # Each run of data lines is parsed, shifted and written in one pass
+        x, y, z, bad_rows = parse_fault_lines(run_lines)
+        if len(bad_rows):
+            skipped += len(bad_rows)
+            first_skipped = first_skipped or line_nums[bad_rows[0]]
+        apply_shift(x, y, x_shift, y_shift)
+        outfile.write(format_rows(x, y, z, row_format=FAULT_LINE_FORMAT))
+
+    report_skipped(input_file, skipped, first_skipped)
+
+def is_fault_data_line(line):
+    """Check whether a right-stripped fault file line holds fixed-width X, Y, Z data"""
+    return len(line) >= FAULT_MIN_LINE_LENGTH and not line.lstrip().startswith(HEADER_MARKERS)
+
+def parse_fault_lines(lines):
+    """
+    Parse fixed-width fault lines into X, Y, Z arrays
 
-                    # Write transformed coordinates
-                    outfile.write(f"{x_new:.5f},{y_new:.5f},{z:.4f}\n")
+    Args:
+        lines (sequence): Data lines with their leading whitespace intact
 
-            except ValueError as e:
-                print(f"Warning: Skipping line {line_num} - invalid data: {e}")
-                continue
+    Returns:
+        Tuple of (x, y, z) float64 arrays, with null Z values replaced by
+        FAULT_NULL_OUTPUT, and the indices of the lines dropped as unparseable
+    """
+    x, y, z, bad_rows = parse_fault_xyz(lines)
+    z[np.isnan(z)] = FAULT_NULL_OUTPUT
+    return x, y, z, bad_rows
+
+def apply_shift(x, y, x_shift, y_shift):
+    """Offset x/y coordinate arrays in place, using the numba kernel when it is available"""
+    if HAS_NUMBA:
+        shift_xy(x, y, x_shift, y_shift)
+    else:
+        x += x_shift
+        y += y_shift
 
 def transform_with_proj_command(input_file, output_file):
     """Transform using proj command line tool as fallback"""
@@ -130,80 +314,99 @@ def transform_with_proj_command(input_file, output_file):
         '+proj=lcc +lat_0=33.33333333333334 +lon_0=-98 +lat_1=33.93333333333333 +lat_2=32.13333333333333 +x_0=2000000 +y_0=0 +datum=NAD83 +units=us-ft +no_defs'
     ]
 
+    failed = 0
     try:
-        with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-            for line_num, line in enumerate(infile, 1):
-                line = line.strip()
-                if not line:
-                    continue
-
-                try:
-                    x, y, z = map(float, line.split(','))
-
-                    # Use proj to transform the coordinate
-                    result = subprocess.run(
-                        proj_cmd + [f"{x} {y}"],
-                        capture_output=True,
-                        text=True,
-                        check=True
-                    )
-
-                    x_new, y_new = map(float, result.stdout.strip().split())
-
-                    # Write transformed coordinates
-                    outfile.write(f"{x_new:.5f},{y_new:.5f},{z:.4f}\n")
-
-                except ValueError as e:
-                    print(f"Warning: Skipping line {line_num} - invalid data: {e}")
-                    continue
-
-    except subprocess.CalledProcessError as e:
+        with open_output(output_file) as outfile:
+            for x, y, z in read_xyz_chunks(input_file):
+                # Stream the whole chunk through one proj process instead of one process per point
+                proc = subprocess.Popen(proj_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                stdout, _ = proc.communicate(format_rows(x, y, row_format=PROJ_INPUT_FORMAT))
+                if proc.returncode != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, proj_cmd)
+
+                # proj writes one "x y" pair per input line, with "*" fields for points it cannot transform
+                pairs = np.array(stdout.split()).reshape(-1, 2)
+                ok = ~(pairs == '*').any(axis=1)
+                failed += len(ok) - np.count_nonzero(ok)
+                transformed = pairs[ok].astype(np.float64)
+
+                # Write transformed coordinates, dropping the failed points with their Z values
+                outfile.write(format_rows(transformed[:, 0], transformed[:, 1], z[ok]))
+
+        if failed:
+            print(f"Warning: proj could not transform {failed} point(s) in {input_file}; they were left out")
+
+    except (subprocess.CalledProcessError, OSError) as e:
         print(f"Error running proj command: {e}")
         return False
+    except ValueError as e:
+        print(f"Error reading proj output: {e}")
+        return False
 
     return True
 
-def transform_coordinates(input_file, output_file):
+def transform_coordinates(input_file, output_file, transformer=None):
     """
     Transform coordinates from NAD27 Oklahoma South to NAD83 Oklahoma South
 
     Args:
         input_file (str): Path to input .dat file
         output_file (str): Path to output .dat file
+        transformer: Transformer to reuse (defaults to the cached EPSG:32025 -> EPSG:2268 one)
     """
     # Define coordinate transformation
     # NAD27 Oklahoma South (EPSG:32025) to NAD83 (EPSG:2268)
-    transformer = Transformer.from_crs("EPSG:32025", "EPSG:2268", always_xy=True)
-
-    print(f"Transforming {input_file} to {output_file}")
-
-    with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-        for line_num, line in enumerate(infile, 1):
-            line = line.strip()
-            if not line:
-                continue
+    if transformer is None:
+        transformer = get_transformer(SOURCE_CRS, "EPSG:2268")
 
-            try:
-                # Parse the comma-separated values
-                parts = line.split(',')
-                if len(parts) != 3:
-                    print(f"Warning: Skipping line {line_num} - expected 3 values, got {len(parts)}")
-                    continue
+    transform_csv(input_file, output_file, transformer)
 
-                x, y, z = map(float, parts)
-
-                # Transform coordinates (always_xy=True means x is easting, y is northing)
-                x_new, y_new = transformer.transform(x, y)
+def prefetch_files(paths):
+    """
+    Ask the kernel to start reading the given input files in the background
 
-                # Write transformed coordinates with same precision as input
-                outfile.write(f"{x_new:.5f},{y_new:.5f},{z:.4f}\n")
+    main() calls this on a sliding window just ahead of the files being
+    transformed, so the disk stays busy without a batch larger than the page
+    cache evicting files before they are read. Platforms without
+    posix_fadvise simply read each file on demand.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
 
-            except ValueError as e:
-                print(f"Warning: Skipping line {line_num} - invalid data: {e}")
-                continue
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue  # The transform reports unreadable files itself
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+def _init_worker(use_pyproj):
+    """Pool initializer: build this process's cached Transformer before taking any files"""
+    global _transform_threads
+    _transform_threads = 1
+    configure_proj()
+
+    if use_pyproj:
+        try:
+            get_transformer(SOURCE_CRS, TARGET_CRS)
+        except Exception:
+            pass  # transform_with_pyproj reports the failure and falls back per file
+
+def _run_transform(task):
+    """Run one (transform_func, input_path, output_path) task"""
+    transform_func, input_path, output_path = task
+    transform_func(input_path, output_path)
+    return input_path
 
 def main():
     """Main function to process all .dat files"""
+    configure_proj()
+
     # Define input and output directories
     nad27_dir = "20251016/NAD27"
     nad83_dir = "20251016/NAD83"
@@ -211,8 +414,10 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs(nad83_dir, exist_ok=True)
 
-    # Get all .dat files in NAD27 directory
-    dat_files = [f for f in os.listdir(nad27_dir) if f.endswith('.dat')]
+    # Get all .dat files in NAD27 directory; scandir entries carry their type, so no extra stat calls
+    with os.scandir(nad27_dir) as entries:
+        dat_files = sorted((entry for entry in entries if entry.name.endswith('.dat') and entry.is_file()),
+                           key=lambda entry: entry.name)
 
     if not dat_files:
         print("No .dat files found in NAD27 directory")
@@ -229,12 +434,27 @@ def main():
         print("Note: This is an approximate transformation. For precise work, please fix pyproj installation.")
         transform_func = transform_with_fallback
 
-    # Transform each file
-    for filename in sorted(dat_files):
-        input_path = os.path.join(nad27_dir, filename)
-        output_path = os.path.join(nad83_dir, filename)
-
-        transform_func(input_path, output_path)
+    # Transform each file, spreading files across processes when there is more than one core to use
+    tasks = [(transform_func, entry.path, os.path.join(nad83_dir, entry.name)) for entry in dat_files]
+    processes = min(len(tasks), os.cpu_count() or 1)
+
+    # Read ahead the files being transformed plus the next `processes`; each finished file
+    # moves the window on by one
+    upcoming = (input_path for _, input_path, _ in tasks)
+    prefetch_files(islice(upcoming, 2 * processes))
+
+    if processes > 1:
+        # Spawn gives each worker a clean interpreter; the initializer builds its Transformer once
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes=processes, initializer=_init_worker,
+                          initargs=(transform_func is transform_with_pyproj,)) as pool:
+            # chunksize=1 hands out one file at a time so a large file does not hold up small ones
+            for _ in pool.imap_unordered(_run_transform, tasks, chunksize=1):
+                prefetch_files(islice(upcoming, 1))
+    else:
+        for task in tasks:
+            _run_transform(task)
+            prefetch_files(islice(upcoming, 1))
 
     print(f"\nTransformation complete! Processed {len(dat_files)} files.")
     print(f"Output files saved in: {nad83_dir}")